@@ -1,8 +1,17 @@
 import asyncio
-import urandom as random
+import utime as time
 from drivers.buzzer import Buzzer
 from lib.oled import get_oled
 from lib.buttons import get_arcadebuttons, get_controlpanel
+from lib.inputs import get_inputengine
+from primitives.debounce import Debouncer
+from primitives.eventring import PRESS
+
+# Presses closer than this (in microseconds) are shown as a tie. When the buttons
+# are polled (the default, EXPANDER_INT_PIN unset) press times are those of the
+# scan that saw them, so they are only known to the scan period (1 ms in games):
+# keep this above it. Only interrupt mode timestamps the first press to the us.
+TIE_US = 1500
 
 
 async def buzz(color):
@@ -16,39 +25,75 @@ async def buzz(color):
         await asyncio.create_task(buzzer.tone(int(tone), 60, 0.1))
 
 
-async def _main():
+def first_presses(arcade, tie_us):
+    """Buttons pressed first: the earliest press and any within tie_us of it"""
+    times = {}
+    event = [0, 0, 0]
+    while arcade.events.get(event):
+        idx, edge, ticks = event
+        if edge == PRESS and idx not in times:
+            times[idx] = ticks
+    if not times:
+        return []
+    first = None
+    for t in times.values():  # ticks wrap: compare with ticks_diff, not min()
+        if first is None or time.ticks_diff(t, first) < 0:
+            first = t
+    return [idx for idx, t in times.items() if time.ticks_diff(t, first) < tie_us]
+
+
+async def _main(tie_us):
     arcade = get_arcadebuttons()
+    engine = get_inputengine()
+    oled = get_oled()
     arcade.reset_flags()
+    arcade.events.clear()
     arcade.on()
     ready = True
     while True:
-        if arcade.pressed:
-            if ready:
-                arcade.off()
-                choice = 0
-                if len(arcade.pressed) > 1:
-                    # 2 presses detected. Choose at random.
-                    choice = random.randint(0, len(arcade.pressed)-1)
-                idx = arcade.pressed[choice]
+        await arcade.wait_press()
+        if ready:
+            arcade.off()
+            # presses a little later than the first one are still being debounced
+            await asyncio.sleep_ms(2 * Debouncer.samples * engine.scan_ms)
+            winners = first_presses(arcade, tie_us)
+            if len(winners) > 1:
+                print(f"Tie between {winners}")
+                oled.clear_screen()
+                oled.draw_centered_text("Tie!", 0)
+                oled.show()
+                await asyncio.gather(*[arcade.leds[idx].blink(100, 100, 3) for idx in winners])
+                for idx in winners:
+                    arcade.leds[idx].on()
+            elif winners:
+                idx = winners[0]
                 await asyncio.gather(
                     buzz(arcade.color[idx]),
                     arcade.leds[idx].blink(100, 100, 3))
                 arcade.leds[idx].on()
-                await asyncio.sleep_ms(1000)
-                arcade.reset_flags()
-                ready = False
-            else:
-                for _ in range(2):
-                    arcade.off()
-                    await asyncio.sleep_ms(100)
-                    arcade.on()
-                    await asyncio.sleep_ms(100)
-                arcade.reset_flags()
-                ready = True
-        await asyncio.sleep(0)
+            await asyncio.sleep_ms(1000)
+            arcade.reset_flags()
+            arcade.events.clear()
+            ready = False
+        else:
+            for _ in range(2):
+                arcade.off()
+                await asyncio.sleep_ms(100)
+                arcade.on()
+                await asyncio.sleep_ms(100)
+            oled.clear_screen()
+            oled.draw_centered_text("Buzz!", 0)
+            oled.show()
+            arcade.reset_flags()
+            arcade.events.clear()
+            ready = True
         
 
-async def app_buzzer():
+async def app_buzzer(tie_us=TIE_US):
+    """
+    Args:
+        tie_us: presses closer than this are a tie, see TIE_US
+    """
     print('  >>>  Welcome to the buzzer!  <<<')
 
     oled = get_oled()
@@ -57,16 +102,13 @@ async def app_buzzer():
     oled.draw_centered_text("Buzz!", 0)
     oled.show()
 
-    main = asyncio.create_task(_main())
+    main = asyncio.create_task(_main(tie_us))
 
     cp = get_controlpanel()
     cp.reset_flags()
 
-    while True:
-        if 'select' in cp.pressed:
-            main.cancel()
-            return
-        await asyncio.sleep_ms(0)
+    await cp.wait_press(cp.mask('select'))
+    main.cancel()
 
 if __name__ == '__main__':
     from lib.test_utils import run_test
@@ -0,0 +1,127 @@
+import asyncio
+import utime as time
+from array import array
+from lib.buttons import get_arcadebuttons, get_controlpanel
+from lib.bitmask import iter_bits
+from lib.inputs import get_inputengine
+from lib.oled import get_oled
+from lib import calibration
+from primitives.debounce import Debouncer
+
+QUIET_US = 20_000  # no transition for this long: the edge has stopped bouncing
+MARGIN_MS = 1      # added to the longest bounce measured
+EDGES = 10         # edges to measure per button (5 presses)
+FINISH_MS = 2000   # hold select this long to stop before every button is done
+
+
+class BounceRecorder:
+    """Bounce duration of each edge of a group of buttons, from raw samples"""
+    def __init__(self, n):
+        self.state = 0  # last raw sample
+        self._first = array('L', [0] * n)  # ticks_us of the first and last transition
+        self._last = array('L', [0] * n)   # of the edge being measured
+        self._bouncing = 0
+        self.bounces = [[] for _ in range(n)]  # us from first to last transition of each edge
+
+    def feed(self, raw, now):
+        changed = raw ^ self.state
+        self.state = raw
+        for i in iter_bits(changed):
+            if not self._bouncing & (1 << i):
+                self._bouncing |= 1 << i
+                self._first[i] = now
+            self._last[i] = now
+        for i in iter_bits(self._bouncing & ~changed):
+            if time.ticks_diff(now, self._last[i]) > QUIET_US:
+                self._bouncing &= ~(1 << i)
+                self.bounces[i].append(time.ticks_diff(self._last[i], self._first[i]))
+
+    def windows(self, previous, edges, debounced_us):
+        """Lockout window (ms) per button; buttons with too few edges keep previous.
+
+        Bounces the debouncer already rejects (shorter than debounced_us)
+        need no window, so clean switches keep the shortest latency.
+        """
+        out = list(previous)
+        for i, bounces in enumerate(self.bounces):
+            if len(bounces) < edges:
+                continue
+            longest = max(bounces)
+            out[i] = 0 if longest < debounced_us else (longest + 999) // 1000 + MARGIN_MS
+        return out
+
+    def report(self, names):
+        for name, bounces in zip(names, self.bounces):
+            if bounces:
+                bounces = sorted(bounces)
+                print(f"{name}: {len(bounces)} edges, bounce us "
+                      f"min {bounces[0]} median {bounces[len(bounces) // 2]} max {bounces[-1]}")
+
+
+async def app_calibrate(edges=EDGES):
+    print("  >>>  Debounce calibration  <<<")
+    print(f"Press every button {edges // 2} times. Hold select to stop early.")
+    arcade = get_arcadebuttons()
+    arcade.off()
+    cp = get_controlpanel()
+
+    oled = get_oled()
+    oled.clear_screen()
+    oled.draw_centered_text("Calibration", 0)
+    oled.draw_centered_text("Press each", 20)
+    oled.draw_centered_text(f"button {edges // 2}x", 30)
+    oled.show()
+
+    groups = ((arcade, BounceRecorder(arcade.size), [str(i) for i in range(arcade.size)]),
+              (cp, BounceRecorder(len(cp.names)), cp.names))
+    recorder = groups[0][1]
+    select = cp.mask('select')
+    held_since = None
+
+    while True:
+        # sample as fast as the bus allows, yielding every 20 ms so the rest keeps running
+        end = time.ticks_add(time.ticks_ms(), 20)
+        while time.ticks_diff(end, time.ticks_ms()) > 0:
+            now = time.ticks_us()
+            for group, rec, _ in groups:
+                rec.feed(group.read_held(), now)
+
+        # a lit LED means the button has been measured
+        for i, bounces in enumerate(recorder.bounces):
+            if len(bounces) >= edges and not arcade.leds[i]():
+                arcade.leds[i].on()
+        if all(len(bounces) >= edges for bounces in recorder.bounces):
+            break
+        if groups[1][1].state & select:
+            if held_since is None:
+                held_since = time.ticks_ms()
+            elif time.ticks_diff(time.ticks_ms(), held_since) > FINISH_MS:
+                break
+        else:
+            held_since = None
+        await asyncio.sleep_ms(0)
+
+    # the debouncer rejects anything shorter than its sampling window
+    debounced_us = Debouncer.samples * get_inputengine().scan_ms * 1000
+    saved = calibration.load('debounce', {})
+    for group, rec, names in groups:
+        rec.report(names)
+        previous = saved.get(group.name) or [0] * len(names)
+        saved[group.name] = windows = rec.windows(previous, edges, debounced_us)
+        group.set_lockout(windows)
+        print(f"{group.name} windows (ms): {windows}")
+    calibration.save('debounce', saved)
+
+    arcade.off()
+    oled.clear_screen()
+    oled.draw_centered_text("Calibration", 0)
+    oled.draw_centered_text("saved", 20)
+    oled.show()
+    await asyncio.sleep_ms(2000)
+    arcade.reset_flags()
+    cp.reset_flags()
+
+
+if __name__ == '__main__':
+    from lib.test_utils import run_test
+    run_test(app_calibrate)
@@ -34,12 +34,8 @@ async def app_faster_light(start_time=2000, accel=0.9):
     timer = start_time
     while True:
         led_on = light_random()
-        start = time.ticks_ms()
         arcade.reset_flags()
-        while led_on not in arcade.pressed and time.ticks_diff(time.ticks_ms(), start) < timer:
-            await asyncio.sleep_ms(1)
-
-        if time.ticks_diff(time.ticks_ms(), start) > timer:
+        if not await arcade.wait_press(arcade.mask(led_on), timeout_ms=int(timer)):
             break
 
         score += 1
@@ -1,5 +1,6 @@
 import asyncio
 from lib.buttons import get_arcadebuttons, get_controlpanel
+from lib.dimmer import get_dimmer, LEVELS
 
 
 
@@ -14,8 +15,7 @@ async def pharmacy_blink_circle(inwards=False):
     if inwards:
         sequence = sequence[::-1]
     for seq in sequence:
-        for idx in seq:
-            arcade.leds[idx].on()
+        arcade.set_leds(arcade.mask(*seq))
         await asyncio.sleep_ms(200)
         arcade.off()
 
@@ -26,11 +26,14 @@ async def pharmacy_blink_spiral(inwards=False):
     arcade.off()
 
     direction = -1 if inwards else 1
+    lit = 0
     for idx in sequence[::direction]:
-        arcade.leds[idx].on()
+        lit |= 1 << idx
+        arcade.set_leds(lit)
         await asyncio.sleep_ms(50)
     for idx in sequence[::direction]:
-        arcade.leds[idx].off()
+        lit &= ~(1 << idx)
+        arcade.set_leds(lit)
         await asyncio.sleep_ms(50)
 
 
@@ -42,19 +45,27 @@ async def pharmacy_blink_cross(clockwise=True):
         [8, 14, 7, 1],
     ]
     arcade = get_arcadebuttons()
-    for idx in range(16):
-        if idx in center:
-            arcade.leds[idx].on()
-        else:
-            arcade.leds[idx].off()
+    arcade.set_leds(arcade.mask(*center))
 
     direction = 1 if clockwise else -1
     for branch in branches[::direction]:
-        for idx in branch:
-            arcade.leds[idx].on()
+        mask = arcade.mask(*branch)
+        arcade.apply(on_mask=mask)
         await asyncio.sleep_ms(150)
-        for idx in branch:
-            arcade.leds[idx].off()
+        arcade.apply(off_mask=mask)
+
+async def pharmacy_breathe(step_ms=80):
+    """Whole board fading in and out"""
+    dimmer = get_dimmer()
+    board = (1 << get_arcadebuttons().size) - 1
+    dimmer.start()
+    try:
+        for level in list(range(LEVELS)) + list(range(LEVELS - 2, -1, -1)):
+            dimmer.set_levels(board, level)
+            await asyncio.sleep_ms(step_ms)
+    finally:
+        dimmer.stop()
+    dimmer.report()
 
 def sequence():
     seq = ([
@@ -63,7 +74,8 @@ def sequence():
         [(pharmacy_blink_spiral, {}, 1),
          (pharmacy_blink_spiral, {'inwards': True}, 1)] * 2 +
         [(pharmacy_blink_cross, {}, 5),
-         (pharmacy_blink_cross, {'clockwise': False}, 5)
+         (pharmacy_blink_cross, {'clockwise': False}, 5),
+         (pharmacy_breathe, {}, 3)
         ])
     counter = 0
     while True:
@@ -80,7 +92,7 @@ async def app_idle():
     seq = sequence()
     try:
         while True:
-            if 'select' in cp.pressed:  # Abort
+            if cp.is_pressed('select'):  # Abort
                 return
             
             # Get the next animation task and await it
@@ -41,11 +41,16 @@ async def app_light_chaser(hardcore=False, timer=20_000, nleds=3):
     printed = 0
     print()
     while True:
-        while not arcade.pressed and time.ticks_diff(time.ticks_ms(), start) < timer:
-            await asyncio.sleep_ms(1)
-            if time.ticks_diff(time.ticks_ms(), start) > (printed + 1) * 1000:
+        while True:
+            elapsed = time.ticks_diff(time.ticks_ms(), start)
+            if elapsed >= timer:
+                break
+            if elapsed > (printed + 1) * 1000:
                 printed += 1
                 print(printed, end=' ')
+            # sleep until a press, the next second or the end of the game
+            if await arcade.wait_press(timeout_ms=min(timer, (printed + 1) * 1000 + 1) - elapsed):
+                break
 
         if time.ticks_diff(time.ticks_ms(), start) >= timer:
             break
@@ -58,7 +63,7 @@ async def app_light_chaser(hardcore=False, timer=20_000, nleds=3):
         score += len(found)
 
         if hardcore:
-            score -= (len(arcade.pressed) - len(found))
+            score -= (arcade.count_pressed() - len(found))
         
         arcade.reset_flags()
 
@@ -96,12 +101,8 @@ async def test():
             arcade.reset_flags()
             
             # Wait for button press with timeout
-            start_time = time.ticks_ms()
-            while not arcade.pressed:
-                if time.ticks_diff(time.ticks_ms(), start_time) > 5000:  # 5 second timeout
-                    print('Timeout reached, restarting game...')
-                    break
-                await asyncio.sleep_ms(10)
+            if not await arcade.wait_press(timeout_ms=5000):  # 5 second timeout
+                print('Timeout reached, restarting game...')
             
             # Cleanup
             arcade.off()
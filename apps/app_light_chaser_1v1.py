@@ -54,7 +54,7 @@ async def app_light_chaser_1v1(time_limit=20_000, nleds=3, error_prob=0.5):
     print()
     while True:
         # Abort
-        if 'select' in cp.pressed:
+        if cp.is_pressed('select'):
             await asyncio.sleep_ms(1)
             return
 
@@ -109,7 +109,7 @@ async def app_light_chaser_1v1(time_limit=20_000, nleds=3, error_prob=0.5):
 
     arcade.reset_flags()
     while True:
-        if arcade.pressed:
+        if arcade.pressed_mask:
             arcade.reset_flags()
             arcade.off()
             return
@@ -125,7 +125,7 @@ async def test():
         print('monitor restart')
         arcade = get_arcadebuttons()
         arcade.reset_flags()
-        while not arcade.pressed:
+        while not arcade.pressed_mask:
             await asyncio.sleep_ms(1)
         # print(arcade.pressed)
 
@@ -2,6 +2,7 @@ import asyncio
 import utime as time
 import urandom as random
 from lib.buttons import get_arcadebuttons, get_controlpanel
+from primitives.eventring import PRESS
 from lib.music import Music, SONGS
 
 
@@ -13,6 +14,7 @@ async def app_marcel_reflex():
 
     arcade = get_arcadebuttons()
     arcade.reset_flags()
+    arcade.events.clear()
     arcade.off()
 
     cp = get_controlpanel()
@@ -20,11 +22,13 @@ async def app_marcel_reflex():
 
     state = 0  # 0: between press (all off), 1: press quick!
     timer = time.ticks_ms()
+    lit_at = 0  # ticks_us when the LED was latched on the expander
     last = -1
+    event = [0, 0, 0]  # button, edge, ticks_us
 
     while True:
 
-        if "select" in cp.pressed:
+        if cp.is_pressed('select'):
             # Cleanup and exit
             arcade.off()
             arcade.reset_flags()
@@ -44,19 +48,26 @@ async def app_marcel_reflex():
                     break
             print(f"Timer reached: switching {rnd} on")
             arcade.leds[rnd].on()
+            arcade.flush()  # time from when the LED is actually lit, not from the RAM write
+            lit_at = time.ticks_us()
             last = rnd
             state = 1
             timer = time.ticks_ms()
 
-        if state and arcade.pressed:
-            for idx in arcade.pressed:
-                print(idx)
-                print(arcade.leds[idx]())
-                if arcade.leds[idx]():
-                    arcade.leds[idx].off()
-                    song = Music(SONGS[random.choice(list(SONGS))])
-                    await asyncio.create_task(song.play())
-            arcade.reset_flags()
+        # every press is seen, in order, with the time it happened
+        while arcade.events.get(event):
+            idx, edge, ticks = event
+            if not state or edge != PRESS:
+                continue
+            if arcade.leds[idx]():
+                print(f"Reaction time: {time.ticks_diff(ticks, lit_at) // 1000} ms")
+                arcade.leds[idx].off()
+                song = Music(SONGS[random.choice(list(SONGS))])
+                await asyncio.create_task(song.play())
+                arcade.events.clear()  # presses during the song don't count
+            else:
+                print(f"Missed: {idx}")
+        arcade.reset_flags()
 
         await asyncio.sleep_ms(1)
 
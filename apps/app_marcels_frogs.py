@@ -1,6 +1,6 @@
 import asyncio
 import urandom as random
-from lib.buttons import get_arcadebuttons, get_controlpanel, array_to_index
+from lib.buttons import get_arcadebuttons, get_controlpanel, array_to_index, wait_any
 from lib.music import Music, SONGS
 
 
@@ -40,14 +40,13 @@ async def app_marcels_frogs():
     cp = get_controlpanel()
     cp.reset_flags()
 
-    while 'select' not in cp.pressed:
+    while not cp.is_pressed('select'):
         await light_square()
 
         while any([led() for led in arcade.leds]):
 
-            while not arcade.pressed and 'select' not in cp.pressed:
-                await asyncio.sleep_ms(1)
-            if 'select' in cp.pressed:
+            await wait_any(arcade, (cp, cp.mask('select')))
+            if cp.is_pressed('select'):
                 return
             
             for idx in arcade.pressed:
@@ -2,7 +2,7 @@ import asyncio
 import utime as time
 import urandom as random
 from drivers.buzzer import Buzzer
-from lib.buttons import get_arcadebuttons, get_controlpanel
+from lib.buttons import get_arcadebuttons, get_controlpanel, wait_any
 
 
 class Song:
@@ -34,7 +34,7 @@ async def app_marcels_quest():
     song = Song()
 
     last = -1
-    while 'select' not in cp.pressed:
+    while not cp.is_pressed('select'):
         while True:
             rnd = random.randint(0, len(arcade.leds) - 1)
             if not arcade.leds[rnd].value() and not arcade[rnd] and rnd != last:
@@ -45,9 +45,8 @@ async def app_marcels_quest():
         arcade.leds[rnd].on()
         song.incr()
 
-        while rnd not in arcade.pressed and 'select' not in cp.pressed:
-            await asyncio.sleep_ms(1)
-        if 'select' in cp.pressed:
+        await wait_any((arcade, arcade.mask(rnd)), (cp, cp.mask('select')))
+        if cp.is_pressed('select'):
             return
         await asyncio.create_task(song.play())
         arcade.leds[rnd].off()
@@ -100,7 +100,7 @@ async def app_memory_sound():
     print('YYY', board.state, board.turns)
     while True:
         # Abort
-        if 'select' in cp.pressed:
+        if cp.is_pressed('select'):
             board.player.cancel()
             await asyncio.sleep_ms(1)
             return
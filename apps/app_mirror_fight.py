@@ -44,8 +44,8 @@ class Board:
         self.leds[self.mirror[idx]].toggle()
 
     def state(self):
-        """Current state. Access underlying pin for optim purposes."""
-        return [led.pin.value() for led in self.leds]
+        """Current state, read from RAM"""
+        return [led() for led in self.leds]
 
 
 async def buzz():
@@ -77,7 +77,7 @@ async def app_mirror_fight(time_limit=20_000):
         board.light_random()
     while True:
         # Abort
-        if 'select' in cp.pressed:
+        if cp.is_pressed('select'):
             await asyncio.sleep_ms(0)
             return
 
@@ -120,7 +120,7 @@ async def app_mirror_fight(time_limit=20_000):
 
     arcade.reset_flags()
     while True:
-        if arcade.pressed:
+        if arcade.pressed_mask:
             arcade.reset_flags()
             arcade.off()
             return
@@ -44,9 +44,9 @@ class Board:
     async def button_sounds(self):
         while True:
             # Active button press
-            if self.currently_pressed is None and self.arcade.pressed:
+            if self.currently_pressed is None and self.arcade.pressed_mask:
                #  print(f"TTT detected button press: {self.arcade.pressed}")
-                pressed = self.arcade.pressed[0]
+                pressed = self.arcade.first_pressed()
                 self.arcade.reset_pressed()
                 if pressed in self.active:
                     self.currently_pressed = pressed
@@ -60,7 +60,7 @@ class Board:
             # Pressed button release
             # print(self.currently_pressed, self.arcade.released)
             if (self.currently_pressed is not None and
-                self.arcade.released_flag[self.currently_pressed]):
+                self.arcade.is_released(self.currently_pressed)):
                     # print(f"TTT detected button release: {self.arcade.released}")
                     self.arcade.reset_released()
                     self.arcade.off()
@@ -144,7 +144,7 @@ async def app_mirror_sequence():
     guess = []
     # print("TTT start mainloop")
     while True:
-        if 'select' in cp.pressed:  # Abort
+        if cp.is_pressed('select'):  # Abort
             board.stop()
             await asyncio.sleep_ms(0)
             return
@@ -191,7 +191,7 @@ async def app_mirror_sequence():
     board.stop()
     arcade.reset_flags()
     while True:
-        if arcade.pressed:
+        if arcade.pressed_mask:
             arcade.reset_flags()
             arcade.off()
             return
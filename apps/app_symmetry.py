@@ -1,7 +1,7 @@
 import asyncio
 import utime as time
 import urandom as random
-from lib.buttons import get_arcadebuttons, get_controlpanel, array_to_index, index_to_array
+from lib.buttons import get_arcadebuttons, get_controlpanel, array_to_index, index_to_array, wait_any
 from lib.oled import get_oled
 from lib.music import Music, SONGS
 
@@ -20,13 +20,12 @@ class Symmetry:
         while sum(a for line in self.pattern for a in line) < proportion * 8:
             self.pattern[random.randint(0, 1)][random.randint(0, 3)] = True
     
-        arcade = get_arcadebuttons()
-        arcade.off()
+        mask = 0
         for x in range(2):
             for y in range(4):
                 if self.pattern[x][y]:
-                    index = array_to_index(x, y)
-                    arcade.leds[index].on()
+                    mask |= 1 << array_to_index(x, y)
+        get_arcadebuttons().set_leds(mask)
     
     @property
     def full_pattern(self):
@@ -53,14 +52,13 @@ async def app_symmetry():
 
     sym = Symmetry()
 
-    while 'select' not in cp.pressed:
+    while not cp.is_pressed('select'):
         sym.new_pattern()
 
         while sym.full_pattern != [bool(led()) for led in arcade.leds]:
 
-            while not arcade.pressed and 'select' not in cp.pressed:
-                await asyncio.sleep_ms(1)
-            if 'select' in cp.pressed:
+            await wait_any(arcade, (cp, cp.mask('select')))
+            if cp.is_pressed('select'):
                 return
             
             for idx in arcade.pressed:
@@ -14,7 +14,7 @@ async def buzz():
 
 class TugOfWar:
     def __init__(self):
-        arcade = get_arcadebuttons()
+        self.arcade = arcade = get_arcadebuttons()
         self.leds = arcade.leds
         # Left player (blue/white)
         self.left_buttons = [i for i, c in enumerate(arcade.color)
@@ -42,11 +42,7 @@ class TugOfWar:
     
     def update_rope_display(self):
         """Update the LED display based on rope position"""
-        for i, led in enumerate(self.leds):
-            if not led() and i in self.rope_positions:
-                led.on()
-            elif led() and i not in self.rope_positions:
-                led.off()
+        self.arcade.set_leds((0xff << self.rope_start) & 0xffff)
     
     def update_score(self, left_pressed, right_pressed):
         """Update scores based on button presses"""
@@ -93,6 +89,7 @@ async def app_tug_of_war(time_limit=60_000):
     
     arcade = get_arcadebuttons()
     arcade.reset_flags()
+    arcade.reset_counts()
     arcade.off()
     
     cp = get_controlpanel()
@@ -107,7 +104,7 @@ async def app_tug_of_war(time_limit=60_000):
     # Game loop
     while True:
         # Check for abort
-        if 'select' in cp.pressed:
+        if cp.is_pressed('select'):
             arcade.off()
             await asyncio.sleep_ms(0)
             return
@@ -116,9 +113,9 @@ async def app_tug_of_war(time_limit=60_000):
         if time.ticks_diff(time.ticks_ms(), game.start_time) >= time_limit:
             break
         
-        # Count button presses for each player
-        left_pressed = 3 in arcade.pressed
-        right_pressed = 12 in arcade.pressed
+        # Count button presses for each player: every press since the last loop
+        left_pressed = arcade.take_presses(3)
+        right_pressed = arcade.take_presses(12)
         
         # Update scores and rope position
         if left_pressed > 0 or right_pressed > 0:
@@ -129,7 +126,6 @@ async def app_tug_of_war(time_limit=60_000):
         if game.is_game_over():
             break
         
-        arcade.reset_flags()
         await asyncio.sleep_ms(10)
     
     # Game over
@@ -154,7 +150,7 @@ async def app_tug_of_war(time_limit=60_000):
     # Wait for any button press to exit
     arcade.reset_flags()
     while True:
-        if arcade.pressed:
+        if arcade.pressed_mask:
             arcade.reset_flags()
             arcade.off()
             return
@@ -36,7 +36,7 @@ async def app_whackamole(interval=1_000, coeff=0.95, max_miss=5):
 
     while True:
         # Interrupt
-        if 'select' in cp.pressed:
+        if cp.is_pressed('select'):
             break
 
         # Lost
@@ -70,7 +70,7 @@ async def app_whackamole(interval=1_000, coeff=0.95, max_miss=5):
             del timer[mole]
 
         # Mole pressed
-        if arcade.pressed:
+        if arcade.pressed_mask:
             found = [i for i in arcade.pressed if arcade.leds[i]()]
             if found:
                 missed = 0
@@ -79,7 +79,7 @@ async def app_whackamole(interval=1_000, coeff=0.95, max_miss=5):
                 del timer[idx]
                 asyncio.create_task(buzzer.tone(440, 30, 0.5))
             score += len(found)
-            off_press += len(arcade.pressed) - len(found)
+            off_press += arcade.count_pressed() - len(found)
             # Too harsh: press off = miss
             # if len(found) < len(arcade.pressed):
             #     missed += len(arcade.pressed) - len(found)
@@ -1,4 +1,158 @@
 from machine import Pin, I2C
+from array import array
+from utime import ticks_us, ticks_diff, sleep_us
 
+# Count transactions, bytes and bus time on I2C0 (see InstrumentedI2C.summary)
+INSTRUMENT = False
 
-I2C0 = I2C(0, scl=Pin(21), sda=Pin(20))
+_SCL = const(21)
+_SDA = const(20)
+_TIMEOUT_US = const(5000)  # bound on a single transaction, so a bad bus can't stall the loop
+
+_MAX_DEVICES = const(8)
+_NREGS = const(32)        # register addresses tracked per device
+_NOREG = const(_NREGS - 1)  # slot for transactions without a register address
+
+
+class InstrumentedI2C:
+    """I2C wrapper keeping per device and per register statistics.
+
+    Counters live in preallocated arrays so the hot path doesn't allocate.
+    Only the first transaction with a new device address assigns it a slot.
+    """
+    def __init__(self, i2c):
+        self._i2c = i2c
+        self._slots = bytearray(128)  # device address -> slot + 1
+        self._addresses = bytearray(_MAX_DEVICES)
+        self._ndevices = 0
+        size = _MAX_DEVICES * _NREGS
+        self._count = array('L', bytes(4 * size))
+        self._bytes = array('L', bytes(4 * size))
+        self._us = array('L', bytes(4 * size))
+        self._peak = array('L', bytes(4 * size))
+
+    def _slot(self, addr):
+        slot = self._slots[addr]
+        if not slot:
+            if self._ndevices == _MAX_DEVICES:
+                return _MAX_DEVICES - 1  # out of slots: pool with the last device
+            self._addresses[self._ndevices] = addr
+            self._ndevices += 1
+            slot = self._slots[addr] = self._ndevices
+        return slot - 1
+
+    def _record(self, addr, reg, nbytes, t0):
+        dt = ticks_diff(ticks_us(), t0)
+        i = self._slot(addr) * _NREGS + reg
+        self._count[i] += 1
+        self._bytes[i] += nbytes
+        self._us[i] += dt
+        if dt > self._peak[i]:
+            self._peak[i] = dt
+
+    def readfrom_mem_into(self, addr, memaddr, buf):
+        t0 = ticks_us()
+        try:
+            self._i2c.readfrom_mem_into(addr, memaddr, buf)
+        finally:
+            self._record(addr, memaddr & _NOREG, len(buf), t0)
+
+    def writeto_mem(self, addr, memaddr, buf):
+        t0 = ticks_us()
+        try:
+            self._i2c.writeto_mem(addr, memaddr, buf)
+        finally:
+            self._record(addr, memaddr & _NOREG, len(buf), t0)
+
+    def readfrom_mem(self, addr, memaddr, nbytes):
+        t0 = ticks_us()
+        try:
+            return self._i2c.readfrom_mem(addr, memaddr, nbytes)
+        finally:
+            self._record(addr, memaddr & _NOREG, nbytes, t0)
+
+    def readfrom_into(self, addr, buf):
+        t0 = ticks_us()
+        try:
+            self._i2c.readfrom_into(addr, buf)
+        finally:
+            self._record(addr, _NOREG, len(buf), t0)
+
+    def writeto(self, addr, buf):
+        t0 = ticks_us()
+        try:
+            return self._i2c.writeto(addr, buf)
+        finally:
+            self._record(addr, _NOREG, len(buf), t0)
+
+    def __getattr__(self, name):
+        # scan(), readfrom() and the rest go straight to the bus, uncounted
+        return getattr(self._i2c, name)
+
+    def reset(self):
+        for counter in (self._count, self._bytes, self._us, self._peak):
+            for i in range(len(counter)):
+                counter[i] = 0
+
+    def snapshot(self):
+        """{address: (transactions, bytes, us, peak_us, {register: (transactions, bytes, us, peak_us)})}"""
+        out = {}
+        for slot in range(self._ndevices):
+            registers = {}
+            for reg in range(_NREGS):
+                i = slot * _NREGS + reg
+                if self._count[i]:
+                    registers[reg] = (self._count[i], self._bytes[i], self._us[i], self._peak[i])
+            out[self._addresses[slot]] = (
+                sum(r[0] for r in registers.values()),
+                sum(r[1] for r in registers.values()),
+                sum(r[2] for r in registers.values()),
+                max([r[3] for r in registers.values()] + [0]),
+                registers)
+        return out
+
+    def summary(self, title="I2C"):
+        print(f"--- {title}: I2C bus usage ---")
+        for addr, (count, nbytes, us, peak, registers) in sorted(self.snapshot().items()):
+            print(f"  {addr:#04x}: {count} transactions, {nbytes} bytes, {us} us (peak {peak} us)")
+            for reg, (rcount, rbytes, rus, rpeak) in sorted(registers.items()):
+                name = '  -- ' if reg == _NOREG else f"{reg:#04x}"
+                print(f"      reg {name}: {rcount:6d} tr {rbytes:7d} B {rus:8d} us  peak {rpeak} us")
+
+
+def _init_i2c0():
+    # rp2 hardware I2C objects are singletons: calling this again re-initialises I2C0
+    return I2C(0, scl=Pin(_SCL), sda=Pin(_SDA), timeout=_TIMEOUT_US)
+
+
+def recover_bus():
+    """Free a bus held by a device stuck mid-byte, then re-initialise I2C0.
+
+    Returns True if SDA was stuck low.
+    """
+    sda = Pin(_SDA, Pin.OPEN_DRAIN, value=1)
+    scl = Pin(_SCL, Pin.OPEN_DRAIN, value=1)
+    stuck = not sda.value()
+    # up to 9 clocks let the device shift out the rest of its byte and release SDA
+    for _ in range(9):
+        if sda.value():
+            break
+        scl.value(0)
+        sleep_us(5)
+        scl.value(1)
+        sleep_us(5)
+    # STOP condition: SDA rising while SCL is high
+    scl.value(0)
+    sda.value(0)
+    sleep_us(5)
+    scl.value(1)
+    sleep_us(5)
+    sda.value(1)
+    sleep_us(5)
+    _init_i2c0()
+    return stuck
+
+
+I2C0 = _init_i2c0()
+if INSTRUMENT:
+    I2C0 = InstrumentedI2C(I2C0)
@@ -26,6 +26,8 @@ SOFTWARE.
 
 __version__ = '0.1.4'
 
+import asyncio
+
 # register addresses in port=0, bank=1 mode (easier maths to convert)
 _MCP_IODIR        = const(0x00) # R/W I/O Direction Register
 _MCP_IPOL         = const(0x01) # R/W Input Polarity Port Register
@@ -48,12 +50,23 @@ _MCP_IOCON_SEQOP  = const(32)
 _MCP_IOCON_MIRROR = const(64)
 _MCP_IOCON_BANK   = const(128)
 
+# Registers mirrored in RAM (one bit per register address above). They only
+# change when we write them, so once known they are never read back from the bus.
+# GPIO, INTF and INTCAP reflect the pins and are always read from the chip.
+_MCP_CACHED       = const(0x47f) # IODIR, IPOL, GPINTEN, DEFVAL, INTCON, IOCON, GPPU, OLAT
+
+# Error recovery: first retry delay and cap of the exponential backoff
+_RECOVERY_MS      = const(2)
+_RECOVERY_MAX_MS  = const(500)
+
 
 class Port():
     # represents one of the two 8-bit ports
     def __init__(self, port, mcp):
         self._port = port & 1  # 0=PortA, 1=PortB
         self._mcp = mcp
+        self._cache = bytearray(11)  # RAM copy of the registers (last value read for GPIO), bank=1 offsets
+        self._valid = 0x000          # bitmask of registers whose cached value is known
 
     def _which_reg(self, reg):
         if self._mcp._config & 0x80 == 0x80:
@@ -70,15 +83,63 @@ class Port():
             setattr(self, reg, getattr(self, reg) & ~bit)
 
     def _read(self, reg):
-        return self._mcp._i2c.readfrom_mem(self._mcp._address, self._which_reg(reg), 1)[0]
+        if self._valid & (1 << reg):
+            return self._cache[reg]
+        mcp = self._mcp
+        if not mcp._transfer(self._which_reg(reg), mcp._mv1, False):
+            # chip not answering: carry on with the last known value
+            return 0 if reg == _MCP_INTF else self._cache[reg]
+        val = mcp._buf[0]
+        self._cache[reg] = val
+        if _MCP_CACHED & (1 << reg):
+            self._valid |= 1 << reg
+        return val
 
     def _write(self, reg, val):
         val &= 0xff
-        self._mcp._i2c.writeto_mem(self._mcp._address, self._which_reg(reg), bytearray([val]))
-        # if writing to the config register, make a copy in mcp so that it knows
-        # which bank you're using for subsequent writes
+        mcp = self._mcp
+        mcp._buf[0] = val
+        addr = self._which_reg(reg)
+        # the RAM copy is what recovery restores, so it is updated even if the write fails
+        self._store(reg, val)
+        mcp._transfer(addr, mcp._mv1, True)
+
+    def _store(self, reg, val):
+        # keep the RAM copy in step with a write to the chip
+        if reg == _MCP_GPIO:
+            # writing to GPIO actually writes the output latch
+            reg = _MCP_OLAT
         if reg == _MCP_IOCON:
+            # if writing to the config register, make a copy in mcp so that it knows
+            # which bank you're using for subsequent writes. IOCON is shared by both ports.
             self._mcp._config = val
+            for port in (self._mcp.porta, self._mcp.portb):
+                port._cache[reg] = val
+                port._valid |= 1 << reg
+        elif _MCP_CACHED & (1 << reg):
+            self._cache[reg] = val
+            self._valid |= 1 << reg
+
+    def _update(self, reg, val):
+        # write only if the value differs from the cached one
+        val &= 0xff
+        if val != self._read(reg):
+            self._write(reg, val)
+
+    # masked writes to the output latch: any subset of pins in a single write
+    def write_masked(self, mask, bits):
+        # pins set in mask take the matching value in bits, the others keep theirs
+        latch = self.output_latch
+        self._update(_MCP_OLAT, (latch & ~mask) | (bits & mask))
+
+    def set_bits(self, mask):
+        self.write_masked(mask, 0xff)
+
+    def clear_bits(self, mask):
+        self.write_masked(mask, 0x00)
+
+    def toggle_bits(self, mask):
+        self.write_masked(mask, ~self.output_latch)
 
     @property
     def mode(self):
@@ -157,31 +218,107 @@ class Port():
 
 
 class MCP23017():
-    def __init__(self, i2c, address=0x20):
+    retries = 2  # immediate retries of a failed transfer
+
+    def __init__(self, i2c, address=0x20, bus_recovery=None, **registers):
         self._i2c = i2c
         self._address = address
         self._config = 0x00
         self._virtual_pins = {}
-        self.init()
-
-    def init(self):
-        # error if device not found at i2c addr
-        if self._i2c.scan().count(self._address) == 0:
-            raise OSError('MCP23017 not found at I2C address {:#x}'.format(self._address))
-
+        # error handling: bus_recovery is called before the chip is re-initialised
+        # when transfers keep failing, e.g. to free a stuck bus
+        self._bus_recovery = bus_recovery
+        self._recovery = None  # recovery task while the chip is not answering
+        self._strict = False   # raise on errors instead of degrading (init, recovery)
+        self.errors = 0        # failed transfers
+        self.recoveries = 0    # successful re-initialisations
+        # preallocated transfer buffer and views, so that register accesses don't allocate
+        self._buf = bytearray(4)
+        mv = memoryview(self._buf)
+        self._mv1 = mv[:1]
+        self._mv2 = mv[:2]
+        self._mv4 = mv
+        self.init(**registers)
+
+    def init(self, mode=0xFFFF, input_polarity=0x0000, interrupt_enable=0x0000, default_value=0x0000,
+             interrupt_compare_default=0x0000, io_config=0x00, pullup=0x0000, gpio=0x0000):
+        # Defaults reset to all inputs with no pull-ups and no inverted polarity.
+        # Callers that know their wiring pass the final masks, so that the chip is
+        # set up with two transactions whatever the configuration.
         self.porta = Port(0, self)
         self.portb = Port(1, self)
+        self._config = 0x00
+        self._strict = True
+
+        # io expander configuration - same on both ports, only need to write once.
+        # Bank 0 with sequential operation, for the burst below. This write doubles as
+        # the presence probe: error if device not found at i2c addr.
+        try:
+            self.porta._write(_MCP_IOCON, io_config & ~(_MCP_IOCON_BANK | _MCP_IOCON_SEQOP))
+        except OSError:
+            self._strict = False
+            raise OSError('MCP23017 not found at I2C address {:#x}'.format(self._address))
 
-        self.io_config = 0x00      # io expander configuration - same on both ports, only need to write once
+        # Whole register block IODIRA..OLATB in one sequential write. IOCON appears at both
+        # of its addresses, INTF and INTCAP are read only and ignore the bytes written to
+        # them, GPIO and OLAT both get the latch.
+        registers = (mode, input_polarity, interrupt_enable, default_value, interrupt_compare_default,
+                     self._config * 0x0101, pullup, 0x0000, 0x0000, gpio, gpio)
+        block = bytearray(2 * len(registers))
+        for reg, val in enumerate(registers):
+            block[reg << 1] = val & 0xff
+            block[(reg << 1) | 1] = (val >> 8) & 0xff
+            self.porta._store(reg, val & 0xff)
+            self.portb._store(reg, (val >> 8) & 0xff)
+        try:
+            self._transfer(0x00, block, True)
+            if io_config != self._config:
+                self.io_config = io_config
+        finally:
+            self._strict = False
+
+    def _transfer(self, reg, buf, write):
+        # One register transfer with bounded retries. When the chip keeps failing, the
+        # error is counted and a recovery task started instead of raising into the
+        # caller, which carries on with the RAM image. Returns True if the chip answered.
+        if self._recovery is not None and not self._strict:
+            return False  # degraded: leave the bus alone until the chip is back
+        for _ in range(self.retries + 1):
+            try:
+                if write:
+                    self._i2c.writeto_mem(self._address, reg, buf)
+                else:
+                    self._i2c.readfrom_mem_into(self._address, reg, buf)
+                return True
+            except OSError:
+                self.errors += 1
+        if self._strict:
+            raise OSError('MCP23017 at I2C address {:#x} not responding'.format(self._address))
+        self._recovery = asyncio.create_task(self._recover())
+        return False
+
+    async def _recover(self):
+        # re-initialise the chip from its RAM image, backing off while it stays silent
+        delay = _RECOVERY_MS
+        while True:
+            await asyncio.sleep_ms(delay)
+            self._strict = True
+            try:
+                if self._bus_recovery is not None:
+                    self._bus_recovery()
+                self.resync()
+                self.recoveries += 1
+                self._recovery = None
+                return
+            except OSError:
+                delay = min(2 * delay, _RECOVERY_MAX_MS)
+            finally:
+                self._strict = False
 
-        # Reset to all inputs with no pull-ups and no inverted polarity.
-        self.mode = 0xFFFF                       # in/out direction (0=out, 1=in)
-        self.input_polarity = 0x0000             # invert port input polarity (0=normal, 1=invert)
-        self.interrupt_enable = 0x0000           # int on change pins (0=disabled, 1=enabled)
-        self.default_value = 0x0000              # default value for int on change
-        self.interrupt_compare_default = 0x0000  # int on change control (0=compare to prev val, 1=compare to def val)
-        self.pullup = 0x0000                     # gpio weak pull up resistor - when configured as input (0=disabled, 1=enabled)
-        self.gpio = 0x0000                       # port (0=logic low, 1=logic high)
+    @property
+    def degraded(self):
+        # True while the chip is not answering and accesses fall back on the RAM image
+        return self._recovery is not None
 
     def config(self, interrupt_polarity=None, interrupt_open_drain=None, sda_slew=None, sequential_operation=None, interrupt_mirror=None, bank=None):
         io_config = self.porta.io_config
@@ -227,6 +364,22 @@ class MCP23017():
             value &= ~bit
         return value
 
+    def invalidate(self):
+        # forget the RAM copy of the registers: the next access reads them from the chip
+        self.porta._valid = 0
+        self.portb._valid = 0
+
+    def resync(self):
+        # push the RAM copy of the registers back to the chip, e.g. after it was reset.
+        # A reset chip is back in bank=0, so IOCON goes first at its bank=0 address.
+        config = self.porta._cache[_MCP_IOCON]
+        self._config = 0x00
+        self.porta._write(_MCP_IOCON, config)
+        for port in (self.porta, self.portb):
+            for reg in range(_MCP_OLAT + 1):
+                if reg != _MCP_IOCON and port._valid & (1 << reg):
+                    port._write(reg, port._cache[reg])
+
     def pin(self, pin, mode=None, value=None, pullup=None, polarity=None, interrupt_enable=None, interrupt_compare_default=None, default_value=None):
         assert 0 <= pin <= 15
         port = self.portb if pin // 8 else self.porta
@@ -238,7 +391,7 @@ class MCP23017():
         if value is not None:
             # 0: Pin is set to logic low
             # 1: Pin is set to logic high
-            port._flip_property_bit('gpio', value & 1, bit)
+            port._flip_property_bit('output_latch', value & 1, bit)
         if pullup is not None:
             # 0: Weak pull-up 100k ohm resistor disabled
             # 1: Weak pull-up 100k ohm resistor enabled
@@ -274,50 +427,112 @@ class MCP23017():
         port = self.portb if port else self.porta
         return port.interrupt_captured
 
+    def _burst(self):
+        # with bank=0 and sequential operation enabled, the port A and port B copies
+        # of a register sit at consecutive addresses and the chip auto-increments
+        # the address pointer, so both can be moved in one 2-byte transaction
+        return self._config & (_MCP_IOCON_BANK | _MCP_IOCON_SEQOP) == 0
+
+    def _read16(self, reg):
+        porta, portb = self.porta, self.portb
+        if porta._valid & portb._valid & (1 << reg):
+            return porta._cache[reg] | (portb._cache[reg] << 8)
+        if not self._burst():
+            return porta._read(reg) | (portb._read(reg) << 8)
+        if not self._transfer(reg << 1, self._mv2, False):
+            # chip not answering: carry on with the last known value
+            return 0 if reg == _MCP_INTF else porta._cache[reg] | (portb._cache[reg] << 8)
+        buf = self._buf
+        porta._cache[reg] = buf[0]
+        portb._cache[reg] = buf[1]
+        if _MCP_CACHED & (1 << reg):
+            porta._valid |= 1 << reg
+            portb._valid |= 1 << reg
+        return buf[0] | (buf[1] << 8)
+
+    def _write16(self, reg, val):
+        if not self._burst():
+            self.porta._write(reg, val)
+            self.portb._write(reg, val >> 8)
+            return
+        buf = self._buf
+        buf[0] = val & 0xff
+        buf[1] = (val >> 8) & 0xff
+        self.porta._store(reg, val & 0xff)
+        self.portb._store(reg, (val >> 8) & 0xff)
+        self._transfer(reg << 1, self._mv2, True)
+
+    # masked writes to both output latches, one write for the port(s) that change
+    def write_masked(self, mask, bits):
+        # pins set in mask take the matching value in bits, the others keep theirs
+        latch = self.output_latch
+        val = ((latch & ~mask) | (bits & mask)) & 0xffff
+        changed = val ^ latch
+        if changed & 0x00ff and changed & 0xff00:
+            self._write16(_MCP_OLAT, val)
+        elif changed & 0x00ff:
+            self.porta._write(_MCP_OLAT, val)
+        elif changed:
+            self.portb._write(_MCP_OLAT, val >> 8)
+
+    def set_bits(self, mask):
+        self.write_masked(mask, 0xffff)
+
+    def clear_bits(self, mask):
+        self.write_masked(mask, 0x0000)
+
+    def toggle_bits(self, mask):
+        self.write_masked(mask, ~self.output_latch)
+
+    def interrupt_state(self):
+        # INTFA, INTFB, INTCAPA and INTCAPB are consecutive in bank=0:
+        # one 4-byte read returns (interrupt_flag, interrupt_captured) and clears the interrupt
+        if not self._burst():
+            return self.interrupt_flag, self.interrupt_captured
+        if not self._transfer(_MCP_INTF << 1, self._mv4, False):
+            return 0, 0  # chip not answering: report no change
+        buf = self._buf
+        return buf[0] | (buf[1] << 8), buf[2] | (buf[3] << 8)
+
     # mode (IODIR register)
     @property
     def mode(self):
-        return self.porta.mode | (self.portb.mode << 8)
+        return self._read16(_MCP_IODIR)
     @mode.setter
     def mode(self, val):
-        self.porta.mode = val
-        self.portb.mode = (val >> 8)
+        self._write16(_MCP_IODIR, val)
 
     # input_polarity (IPOL register)
     @property
     def input_polarity(self):
-        return self.porta.input_polarity | (self.portb.input_polarity << 8)
+        return self._read16(_MCP_IPOL)
     @input_polarity.setter
     def input_polarity(self, val):
-        self.porta.input_polarity = val
-        self.portb.input_polarity = (val >> 8)
+        self._write16(_MCP_IPOL, val)
 
     # interrupt_enable (GPINTEN register)
     @property
     def interrupt_enable(self):
-        return self.porta.interrupt_enable | (self.portb.interrupt_enable << 8)
+        return self._read16(_MCP_GPINTEN)
     @interrupt_enable.setter
     def interrupt_enable(self, val):
-        self.porta.interrupt_enable = val
-        self.portb.interrupt_enable = (val >> 8)
+        self._write16(_MCP_GPINTEN, val)
 
     # default_value (DEFVAL register)
     @property
     def default_value(self):
-        return self.porta.default_value | (self.portb.default_value << 8)
+        return self._read16(_MCP_DEFVAL)
     @default_value.setter
     def default_value(self, val):
-        self.porta.default_value = val
-        self.portb.default_value = (val >> 8)
+        self._write16(_MCP_DEFVAL, val)
 
     # interrupt_compare_default (INTCON register)
     @property
     def interrupt_compare_default(self):
-        return self.porta.interrupt_compare_default | (self.portb.interrupt_compare_default << 8)
+        return self._read16(_MCP_INTCON)
     @interrupt_compare_default.setter
     def interrupt_compare_default(self, val):
-        self.porta.interrupt_compare_default = val
-        self.portb.interrupt_compare_default = (val >> 8)
+        self._write16(_MCP_INTCON, val)
 
     # io_config (IOCON register)
     # This register is duplicated in each port. Changing one changes both.
@@ -331,41 +546,38 @@ class MCP23017():
     # pullup (GPPU register)
     @property
     def pullup(self):
-        return self.porta.pullup | (self.portb.pullup << 8)
+        return self._read16(_MCP_GPPU)
     @pullup.setter
     def pullup(self, val):
-        self.porta.pullup = val
-        self.portb.pullup = (val >> 8)
+        self._write16(_MCP_GPPU, val)
 
     # interrupt_flag (INTF register)
     # read only
     @property
     def interrupt_flag(self):
-        return self.porta.interrupt_flag | (self.portb.interrupt_flag << 8)
+        return self._read16(_MCP_INTF)
 
     # interrupt_captured (INTCAP register)
     # read only
     @property
     def interrupt_captured(self):
-        return self.porta.interrupt_captured | (self.portb.interrupt_captured << 8)
+        return self._read16(_MCP_INTCAP)
 
     # gpio (GPIO register)
     @property
     def gpio(self):
-        return self.porta.gpio | (self.portb.gpio << 8)
+        return self._read16(_MCP_GPIO)
     @gpio.setter
     def gpio(self, val):
-        self.porta.gpio = val
-        self.portb.gpio = (val >> 8)
+        self._write16(_MCP_GPIO, val)
 
     # output_latch (OLAT register)
     @property
     def output_latch(self):
-        return self.porta.output_latch | (self.portb.output_latch << 8)
+        return self._read16(_MCP_OLAT)
     @output_latch.setter
     def output_latch(self, val):
-        self.porta.output_latch = val
-        self.portb.output_latch = (val >> 8)
+        self._write16(_MCP_OLAT, val)
 
     # list interface
     # mcp[pin] lazy creates a VirtualPin(pin, port)
@@ -390,18 +602,19 @@ class VirtualPin():
     def value(self, val=None):
         # if val, write, else read
         if val is not None:
-            self._port.gpio = self._flip_bit(self._port.gpio, val & 1)
+            # the latch is cached, so this is a single bus write (none if unchanged)
+            self._port._update(_MCP_OLAT, self._flip_bit(self._port.output_latch, val & 1))
         else:
             return self._get_bit(self._port.gpio)
 
     def input(self, pull=None):
         # if pull, enable pull up, else read
-        self._port.mode = self._flip_bit(self._port.mode, 1) # mode = input
+        self._port._update(_MCP_IODIR, self._flip_bit(self._port.mode, 1)) # mode = input
         if pull is not None:
-            self._port.pullup = self._flip_bit(self._port.pullup, pull & 1) # toggle pull up
+            self._port._update(_MCP_GPPU, self._flip_bit(self._port.pullup, pull & 1)) # toggle pull up
 
     def output(self, val=None):
         # if val, write, else read
-        self._port.mode = self._flip_bit(self._port.mode, 0) # mode = output
+        self._port._update(_MCP_IODIR, self._flip_bit(self._port.mode, 0)) # mode = output
         if val is not None:
-            self._port.gpio = self._flip_bit(self._port.gpio, val & 1)
\ No newline at end of file
+            self._port._update(_MCP_OLAT, self._flip_bit(self._port.output_latch, val & 1))
\ No newline at end of file
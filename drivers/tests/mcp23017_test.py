@@ -0,0 +1,146 @@
+# mcp23017_test.py Host-side tests for the MCP23017 driver
+
+# Runs on the MicroPython unix port (no hardware needed), from the repo root:
+# micropython -c "from drivers.tests.mcp23017_test import test; test()"
+
+import asyncio
+import micropython
+from drivers.mcp23017 import MCP23017
+
+
+class FakeI2C:
+    """Register file standing in for MCP23017 chips (bank=0, sequential addressing).
+
+    Bus methods don't allocate, so they can run under micropython.heap_lock().
+    """
+    def __init__(self, *addresses):
+        self.chips = {address: bytearray(22) for address in addresses}
+        self.inputs = {address: bytearray(b'\xff\xff') for address in addresses}
+        self.transactions = 0
+        self.offline = set()  # addresses that don't answer
+        for regs in self.chips.values():
+            regs[0] = regs[1] = 0xff  # IODIR resets to all inputs
+
+    def scan(self):
+        return list(self.chips)
+
+    def _get(self, address, reg):
+        regs = self.chips[address]
+        if reg >> 1 == 0x09:  # GPIO: inputs from the pins, outputs from OLAT
+            port = reg & 1
+            iodir = regs[port]
+            return (self.inputs[address][port] & iodir) | (regs[0x14 | port] & ~iodir & 0xff)
+        return regs[reg]
+
+    def _put(self, address, reg, val):
+        if reg >> 1 == 0x09:  # writing GPIO writes OLAT
+            reg = 0x14 | (reg & 1)
+        self.chips[address][reg] = val
+
+    def readfrom_mem(self, address, reg, nbytes):
+        buf = bytearray(nbytes)
+        self.readfrom_mem_into(address, reg, buf)
+        return buf
+
+    def readfrom_mem_into(self, address, reg, buf):
+        self.transactions += 1
+        if address in self.offline:
+            raise OSError(5)
+        for i in range(len(buf)):
+            buf[i] = self._get(address, (reg + i) % 22)
+
+    def writeto_mem(self, address, reg, buf):
+        self.transactions += 1
+        if address in self.offline:
+            raise OSError(5)
+        for i in range(len(buf)):
+            self._put(address, (reg + i) % 22, buf[i])
+
+
+def printres(name, ok):
+    print('{:<40} {}'.format(name, '\x1b[32mOK\x1b[39m' if ok else '\x1b[31mFAIL\x1b[39m'))
+    return ok
+
+
+def allocates(func, *args):
+    # True if func(*args) touched the heap
+    micropython.heap_lock()
+    try:
+        func(*args)
+    except MemoryError:
+        return True
+    finally:
+        micropython.heap_unlock()
+    return False
+
+
+def scan(mcp):
+    return mcp.gpio
+
+
+def led_update(mcp, pin):
+    led = mcp[pin]
+    led.output(val=1)
+    led.output(val=0)
+
+
+def port_read(mcp):
+    return mcp.porta.gpio
+
+
+def noalloc_test():
+    i2c = FakeI2C(0x26)
+    mcp = MCP23017(i2c, 0x26)
+    mcp.mode = 0x5555
+    mcp.pullup = 0x5555
+    mcp[1].output(val=0)  # warm up: creates the VirtualPin and fills the cache
+    ok = printres('gpio scan does not allocate', not allocates(scan, mcp))
+    ok &= printres('port read does not allocate', not allocates(port_read, mcp))
+    ok &= printres('LED update does not allocate', not allocates(led_update, mcp, 1))
+    return ok
+
+
+def cache_test():
+    i2c = FakeI2C(0x26)
+    mcp = MCP23017(i2c, 0x26)
+    mcp.mode = 0x5555
+    i2c.transactions = 0
+    mcp[1].output(val=1)
+    ok = printres('LED on is a single write', i2c.transactions == 1)
+    i2c.transactions = 0
+    mcp[1].output(val=1)
+    ok &= printres('unchanged LED is not written', i2c.transactions == 0)
+    i2c.inputs[0x26][0] = 0xfe
+    ok &= printres('16-bit gpio is a single read', mcp.gpio == 0x5556 and i2c.transactions == 1)
+    return ok
+
+
+async def recovery_test():
+    i2c = FakeI2C(0x26)
+    mcp = MCP23017(i2c, 0x26, mode=0x5555, pullup=0x5555)
+    mcp[1].output(val=1)
+    before = mcp.gpio
+    i2c.offline.add(0x26)
+    ok = printres('failed read returns last value', mcp.gpio == before)
+    ok &= printres('error is counted, chip degraded', mcp.errors == MCP23017.retries + 1 and mcp.degraded)
+    i2c.transactions = 0
+    mcp[3].output(val=1)
+    ok &= printres('degraded chip leaves the bus alone', i2c.transactions == 0)
+    # chip comes back after a power glitch: registers at their reset values
+    i2c.offline.discard(0x26)
+    i2c.chips[0x26][:] = bytearray(22)
+    i2c.chips[0x26][0] = i2c.chips[0x26][1] = 0xff
+    await asyncio.sleep_ms(100)
+    ok &= printres('chip re-initialised from RAM image', not mcp.degraded and mcp.recoveries == 1)
+    ok &= printres('latch restored', i2c.chips[0x26][0x14] == 0x0a and i2c.chips[0x26][0] == 0x55)
+    return ok
+
+
+def test():
+    ok = cache_test()
+    ok &= noalloc_test()
+    try:
+        ok &= asyncio.run(recovery_test())
+    finally:
+        asyncio.new_event_loop()
+    print('All tests passed' if ok else 'Some tests FAILED')
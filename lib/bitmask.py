@@ -0,0 +1,31 @@
+"""Helpers for button and LED states kept as integer bitmasks (bit i for index i)"""
+
+
+def popcount(mask):
+    """Number of set bits"""
+    n = 0
+    while mask:
+        mask &= mask - 1  # clear the lowest set bit
+        n += 1
+    return n
+
+
+def lowest(mask):
+    """Index of the lowest set bit, -1 if none"""
+    if not mask:
+        return -1
+    i = 0
+    while not mask & 1:
+        mask >>= 1
+        i += 1
+    return i
+
+
+def iter_bits(mask):
+    """Indices of the set bits, lowest first"""
+    i = 0
+    while mask:
+        if mask & 1:
+            yield i
+        mask >>= 1
+        i += 1
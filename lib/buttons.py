@@ -1,30 +1,39 @@
-from machine import Pin, I2C
+from machine import Pin
+import sys
 import asyncio
 import utime as time
-from primitives.pushbutton import Pushbutton
+from array import array
 from drivers.mcp23017 import MCP23017
-from drivers.i2c import I2C0
+from drivers.i2c import I2C0, recover_bus
+from lib.topology import BOARD_4X4, COLORS
+from lib.inputs import get_inputengine
+from lib.bitmask import popcount, lowest, iter_bits
+from lib import calibration
+from primitives.eventring import EventRing, PRESS, RELEASE, LONG, DOUBLE, REPEAT
+from primitives.pinbank import PinBank
 
 DEBUG = True
 
+# Pico GPIO wired to the expanders' INTA outputs (open drain, shared by both chips).
+# When set, arcade buttons are read on interrupt instead of being polled.
+EXPANDER_INT_PIN = None
+
+# Which expander pin is which button and LED (see lib/topology.py)
+TOPOLOGY = BOARD_4X4
+
 
 def button_init(nb=-1):
-    i2c = I2C(0, scl=Pin(21), sda=Pin(20))
-    #print(i2c.scan(), [hex(i) for i in i2c.scan()])
-    mcp_yr = MCP23017(i2c, 0x26)
-    mcp_wb = MCP23017(i2c, 0x27)
-    buttons = [mcp_wb[pin] for pin in range(16)][::2]
-    buttons += [mcp_yr[pin] for pin in range(16)][::2]
-    buttons[8:] = buttons[12:] + buttons[8:12]
-    leds = [mcp_wb[pin] for pin in range(16)][1::2]
-    leds += [mcp_yr[pin] for pin in range(16)][1::2]
-    leds[8:] = leds[12:] + leds[8:12]
-    #buttons = [mcp[pin] for pin in range(4)]
-    #leds = [mcp[15 - pin] for pin in range(4)]
-    #buttons = [mcp[pin] for pin in range(6, 10)]
-    #leds = [mcp[pin] for pin in range(10, 14)]
-    for button in buttons:
-        button.input(pull=1)
+    """Legacy (buttons, leds) lists for blocking apps, shared with the arcade group.
+
+    Buttons are the raw expander pins (value() is low while pressed), LEDs are
+    the arcade LEDs: use on()/off() below, they flush at once. The chips and the
+    bus are the arcade group's, so their registers and cached state stay in sync.
+    """
+    arcade = get_arcadebuttons()
+    topology = arcade._topology
+    buttons = [arcade._mcps[topology.chips.index(address)][pin]
+               for address, pin in topology.buttons]
+    leds = list(arcade.leds)
     if nb > 0:
         buttons = buttons[:nb]
         leds = leds[:nb]
@@ -42,38 +51,53 @@ def array_to_index(x, y):
      3 o o o o
      x 
     """
-    return y * 4 + x
+    return TOPOLOGY.index(x, y)
 
 
 def index_to_array(idx):
     """Simple inverse of array_to_index"""
-    return idx % 4, idx // 4
+    return TOPOLOGY.position(idx)
 
 
-# Colors
-COLORS = ("white", "blue", "red", "yellow")
+class Button:
+    """One button of a group, as the Pushbutton it replaces: value() is True while held (debounced)"""
+    def __init__(self, group, index):
+        self._group = group
+        self._bit = 1 << index
+
+    def __call__(self):
+        return self.value()
+
+    def value(self):
+        return bool(self._group._state & self._bit)
+
 
 class LED:
-    def __init__(self, pin):
-        self.pin = pin
-    
+    """One LED of a group's LED word: reads come from RAM, writes are sent by the next flush()"""
+    def __init__(self, group, index):
+        self._group = group
+        self._bit = 1 << index
+
     def __call__(self):
         return self.value()
 
-    def output(self, *args, **kwargs):
-        return self.pin.output(*args, **kwargs)
+    def output(self, val=None):
+        if val is not None:
+            self.value(val)
 
-    def value(self, *args, **kwargs):
-        return self.pin.value(*args, **kwargs)
+    def value(self, val=None):
+        if val is None:
+            return 1 if self._group._leds & self._bit else 0
+        self._group._write_leds(self._bit, self._bit if val else 0)
 
     def on(self):
-        self.output(val=1)
+        self._group._write_leds(self._bit, self._bit)
 
     def off(self):
-        self.output(val=0)
+        self._group._write_leds(self._bit, 0)
 
     def toggle(self):
-        self.output(val=int(not self.value()))
+        self._group._write_leds(self._bit, ~self._group._leds)
 
     async def blink(self, up, down, times):
         for _ in range(times):
@@ -84,51 +108,413 @@ class LED:
 
 
 class _ButtonGroup:
+    """Press/release state kept as bitmasks, bit i for key self._keys[i].
+
+    Flags latch every press and release until reset, so queries don't
+    allocate: pressed_mask, is_pressed(), first_pressed()...
+    The pressed/released lists are kept for compatibility.
+    """
+    _pressed = 0
+    _released = 0
+    _state = 0
+    _holds = ()        # [bit, ms, callback, deadline] registered with on_hold()
+    _deadline = None   # earliest hold or gesture deadline (ticks_ms), checked by the input engine
+    _stamped = 0       # buttons with a first edge time in _edge_us not reported yet
+    name = None       # key of the group's calibration data
+    _lockout_ms = None # per-button window after each debounced edge, see set_lockout()
+    _locked = 0        # buttons whose raw input is ignored until _unlock_ms
+    _dirty = 0         # outputs changed since the last flush(), sent by the input engine
+
+    # Gestures (see gestures()): timings in ms, enabled buttons, latched flags, armed timers
+    long_ms = 1000
+    double_ms = 400
+    repeat_delay_ms = 500
+    repeat_ms = 150
+    _long_mask = _double_mask = _repeat_mask = 0
+    _long = _double = 0
+    _long_armed = _repeat_armed = _clicked = 0
+
     def __getitem__(self, key):
-        return self.pressed_flag[key]
+        return self.is_pressed(key)
     
     def __setitem__(self, key, val):
-        self.pressed_flag[key] = val
-    
-    def _press(self, key):
-        if DEBUG:
-            print("PRESSED", key)
-        self.pressed_flag[key] = True
-    
-    def _release(self, key):
-        if DEBUG:
-            print("RELEASED", key)
-        self.released_flag[key] = True
+        if val:
+            self._pressed |= 1 << self._index(key)
+        else:
+            self._pressed &= ~(1 << self._index(key))
+
+    def _index(self, key):
+        # bit of a key
+        return key
+
+    @property
+    def pressed_mask(self):
+        return self._pressed
+
+    @property
+    def released_mask(self):
+        return self._released
+
+    @property
+    def held_mask(self):
+        """Buttons held down now (debounced)"""
+        return self._state
+
+    def is_pressed(self, key):
+        return bool(self._pressed & (1 << self._index(key)))
+
+    def is_released(self, key):
+        return bool(self._released & (1 << self._index(key)))
+
+    def first_pressed(self):
+        """Pressed key with the lowest index, None if none"""
+        i = lowest(self._pressed)
+        return None if i < 0 else self._keys[i]
+
+    def count_pressed(self):
+        return popcount(self._pressed)
+
+    def iter_pressed(self):
+        for i in iter_bits(self._pressed):
+            yield self._keys[i]
+
+    def iter_released(self):
+        for i in iter_bits(self._released):
+            yield self._keys[i]
+
+    @property
+    def pressed(self):
+        return list(self.iter_pressed())
+
+    @property
+    def released(self):
+        return list(self.iter_released())
+
+    def reset_pressed(self):
+        self._pressed = 0
+
+    def reset_released(self):
+        self._released = 0
 
     def reset_flags(self):
-        self.reset_pressed()
-        self.reset_released()
+        self._pressed = self._released = 0
+        self._long = self._double = 0
+
+    def take_presses(self, key):
+        """Number of presses of key since the last call, and clear it.
+
+        Every debounced press is counted, however fast the button is mashed
+        and however rarely this is called. Counters are only updated by the
+        input engine task, so reading and clearing here can't lose a press.
+        """
+        i = self._index(key)
+        n = self._counts[i]
+        self._counts[i] = 0
+        return n
+
+    def reset_counts(self):
+        for i in range(len(self._counts)):
+            self._counts[i] = 0
+
+    def is_long_pressed(self, key):
+        return bool(self._long & (1 << self._index(key)))
+
+    def is_double_clicked(self, key):
+        return bool(self._double & (1 << self._index(key)))
+
+    def mask(self, *keys):
+        """Bitmask of the given keys, for wait_press() and wait_release()"""
+        mask = 0
+        for key in keys:
+            mask |= 1 << self._index(key)
+        return mask
+
+    async def wait_press(self, mask=None, timeout_ms=None):
+        """Wait until a button in mask (any if None) is flagged pressed. False on timeout
+
+        Like the pressed property, presses since the last reset count.
+        """
+        mask = -1 if mask is None else mask
+        return await get_inputengine().wait(lambda: self._pressed & mask, timeout_ms)
+
+    async def wait_release(self, mask=None, timeout_ms=None):
+        """Wait until a button in mask (any if None) is flagged released. False on timeout"""
+        mask = -1 if mask is None else mask
+        return await get_inputengine().wait(lambda: self._released & mask, timeout_ms)
+
+    def on_hold(self, key, ms, callback):
+        """Call callback() once key has been held down for ms.
+
+        The input engine sleeps until the deadline: no task polls the button.
+        """
+        self._holds += ([1 << self._index(key), ms, callback, None],)
+
+    def gestures(self, long=None, double=None, repeat=None):
+        """Detect gestures on the buttons of each mask (see mask()), None leaves it unchanged.
+
+        long: held for long_ms, LONG event and is_long_pressed()
+        double: pressed again within double_ms, DOUBLE event and is_double_clicked()
+        repeat: held for repeat_delay_ms, then a REPEAT event every repeat_ms,
+            each setting the pressed flag again
+        Timing is done by the input engine from the edge bitmasks: no task per button.
+        """
+        if not hasattr(self, '_long_due'):
+            n = len(self._keys)
+            self._long_due = array('L', [0] * n)    # ticks_ms deadlines
+            self._repeat_due = array('L', [0] * n)
+            self._click_ms = array('L', [0] * n)    # first press of a possible double click
+        if long is not None:
+            self._long_mask = long
+            self._long_armed &= long
+        if double is not None:
+            self._double_mask = double
+            self._clicked &= double
+        if repeat is not None:
+            self._repeat_mask = repeat
+            self._repeat_armed &= repeat
+
+    def _gesture_edges(self, pressed, released, now, now_us):
+        """Arm and disarm gesture timers on debounced edges"""
+        for i in iter_bits(pressed & self._double_mask):
+            bit = 1 << i
+            if self._clicked & bit and time.ticks_diff(now, self._click_ms[i]) <= self.double_ms:
+                self._clicked &= ~bit
+                self._double |= bit
+                self.events.put(i, DOUBLE, now_us)
+            else:
+                self._clicked |= bit
+                self._click_ms[i] = now
+        for i in iter_bits(pressed & self._long_mask):
+            self._long_due[i] = time.ticks_add(now, self.long_ms)
+        for i in iter_bits(pressed & self._repeat_mask):
+            self._repeat_due[i] = time.ticks_add(now, self.repeat_delay_ms)
+        self._long_armed = (self._long_armed | (pressed & self._long_mask)) & ~released
+        self._repeat_armed = (self._repeat_armed | (pressed & self._repeat_mask)) & ~released
+
+    def set_lockout(self, windows):
+        """Ignore each button's raw input for windows[i] ms after it changes state.
+
+        Worn switches bounce for longer than the debouncer's few samples:
+        their calibrated window stops the bounces becoming presses, while
+        clean switches (window 0) keep the shortest latency. None disables.
+        """
+        if windows is None:
+            self._lockout_ms = None
+        else:
+            assert len(windows) == len(self._keys), "one window per button"
+            self._lockout_ms = array('H', windows)
+            self._unlock_ms = array('L', [0] * len(windows))
+        self._locked = 0
+
+    def _load_lockout(self):
+        # debounce windows measured by apps/app_calibrate.py, if any
+        windows = calibration.load('debounce', {}).get(self.name)
+        if windows is not None and len(windows) == len(self._keys):
+            self.set_lockout(windows)
+
+    def _unlocked(self, raw, state):
+        """Raw sample with the buttons still locked out held at their debounced state"""
+        now = time.ticks_ms()
+        for i in iter_bits(self._locked):
+            if time.ticks_diff(self._unlock_ms[i], now) <= 0:
+                self._locked &= ~(1 << i)
+        return (raw & ~self._locked) | (state & self._locked)
+
+    def _stamp(self, i, ticks):
+        # keep the time of the first edge of button i since it last settled
+        bit = 1 << i
+        if not self._stamped & bit:
+            self._stamped |= bit
+            self._edge_us[i] = ticks
+
+    def _stamp_moved(self, held, ticks, irq_mask=0, irq_ticks=0):
+        """Timestamp the buttons whose raw state just left the debounced one.
+
+        Buttons in irq_mask raised the interrupt being serviced and get its time.
+        """
+        moving = held ^ self._state
+        new = moving & ~self._stamped
+        if new:  # no generator on the quiet ticks
+            for i in iter_bits(new):
+                self._stamp(i, irq_ticks if irq_mask & (1 << i) else ticks)
+        # a button back to its debounced state only bounced: forget its edge
+        self._stamped &= moving
+
+    def _edge_time(self, i, now):
+        # ticks_us of the first edge of button i, reported by _apply_state
+        bit = 1 << i
+        if self._stamped & bit:
+            self._stamped &= ~bit
+            return self._edge_us[i]
+        return now
+
+    def _apply_state(self, state):
+        """Report the buttons whose debounced state changed. Returns True on change"""
+        changed = state ^ self._state
+        if not changed:
+            return False
+        self._state = state
+        self._pressed |= changed & state
+        self._released |= changed & ~state
+        now = time.ticks_us()  # one timestamp for every edge of this sample
+        counts = self._counts
+        for i in iter_bits(changed):
+            edge = PRESS if state & (1 << i) else RELEASE
+            self.events.put(i, edge, self._edge_time(i, now))
+            if edge == PRESS and counts[i] < 0xffff:
+                counts[i] += 1
+            if DEBUG:
+                print("PRESSED" if edge else "RELEASED", self._keys[i])
+        if self._lockout_ms is not None:
+            now_ms = time.ticks_ms()
+            for i in iter_bits(changed):
+                if self._lockout_ms[i]:
+                    self._unlock_ms[i] = time.ticks_add(now_ms, self._lockout_ms[i])
+                    self._locked |= 1 << i
+        if self._holds or self._long_mask | self._double_mask | self._repeat_mask:
+            now_ms = time.ticks_ms()
+            for hold in self._holds:
+                if changed & hold[0]:
+                    hold[3] = time.ticks_add(now_ms, hold[1]) if state & hold[0] else None
+            self._gesture_edges(changed & state, changed & ~state, now_ms, now)
+            self._expire(now_ms)
+        return True
+
+    def _expire(self, now):
+        """Fire the timers whose deadline passed and set the next deadline"""
+        deadline = None
+        for i in iter_bits(self._long_armed):
+            due = self._long_due[i]
+            if time.ticks_diff(due, now) <= 0:
+                self._long_armed &= ~(1 << i)
+                self._long |= 1 << i
+                self.events.put(i, LONG, time.ticks_us())
+            elif deadline is None or time.ticks_diff(due, deadline) < 0:
+                deadline = due
+        for i in iter_bits(self._repeat_armed):
+            due = self._repeat_due[i]
+            if time.ticks_diff(due, now) <= 0:
+                self._pressed |= 1 << i
+                self.events.put(i, REPEAT, time.ticks_us())
+                due = self._repeat_due[i] = time.ticks_add(now, self.repeat_ms)
+            if deadline is None or time.ticks_diff(due, deadline) < 0:
+                deadline = due
+        for hold in self._holds:
+            if hold[3] is None:
+                continue
+            if time.ticks_diff(hold[3], now) <= 0:
+                hold[3] = None
+                try:
+                    hold[2]()
+                except Exception as e:
+                    # runs in the input engine task: a failing callback must not stop it
+                    print("on_hold callback failed:")
+                    sys.print_exception(e)
+            elif deadline is None or time.ticks_diff(hold[3], deadline) < 0:
+                deadline = hold[3]
+        self._deadline = deadline
+
+    def _idle(self):
+        # True when the group can wait for an interrupt instead of being polled
+        return False
 
 
 class _ArcadeButtons(_ButtonGroup):
-    def __init__(self):
+    name = 'arcade'
+
+    def __init__(self, topology=None):
         self._i2c = I2C0
-        self._mcp_yr = MCP23017(self._i2c, 0x26)
-        self._mcp_wb = MCP23017(self._i2c, 0x27)
-
-        self.buttons = (
-            [Pushbutton(self._mcp_wb[pin], sense=1) for pin in range(16)][::2] +
-            [Pushbutton(self._mcp_yr[pin], sense=1) for pin in range(16)][::2])
-        self.buttons[8:] = self.buttons[12:] + self.buttons[8:12]
-        self.size = len(self.buttons)
+        self._topology = topology = topology or TOPOLOGY
+        interrupts = EXPANDER_INT_PIN is not None
+
+        # Chip registers are computed up front and written in one burst per chip:
+        # buttons are pulled-up inputs, LEDs are outputs (off)
+        self._mcps = [
+            MCP23017(self._i2c, address, bus_recovery=recover_bus,
+                     mode=0xffff & ~led_mask, pullup=button_mask,
+                     # interrupt on any change of a button, INTA/INTB mirrored and open drain
+                     interrupt_enable=button_mask if interrupts else 0x0000,
+                     io_config=0x44 if interrupts else 0x00)
+            for address, button_mask, led_mask in zip(
+                topology.chips, topology.button_masks, topology.led_masks)]
+
+        self.size = topology.size
+        self.buttons = [Button(self, i) for i in range(topology.size)]
+        # LED state lives in RAM, bit i for LED i: changes are marked dirty and
+        # sent by flush(), at the end of the input engine's tick or on request
+        self._leds = 0  # the chips are initialised with every LED off
+        self._all_leds = (1 << topology.size) - 1
+        self.leds = [LED(self, i) for i in range(topology.size)]
+        self.color = topology.color
+        self._keys = range(self.size)
+        self._values = [0] * len(self._mcps)  # last gpio value of each chip
+        self.events = EventRing()  # (button index, PRESS/RELEASE, ticks_us of the first edge)
+        self._edge_us = array('L', [0] * self.size)
+        self._counts = array('H', [0] * self.size)  # presses, see take_presses()
+        self._irq_us = 0  # when the expander interrupt fired
         self.reset_flags()
-        for i, but in enumerate(self.buttons):
-            but.pin.input(pull=1)
-            but.press_func(self._press, (i,))
-            but.release_func(self._release, (i,))
-
-        self.leds = (
-            [LED(self._mcp_wb[pin]) for pin in range(16)][1::2] +
-            [LED(self._mcp_yr[pin]) for pin in range(16)][1::2])
-        self.leds[8:] = self.leds[12:] + self.leds[8:12]
+        self._load_lockout()
+
+        self._int_pin = None
+        if interrupts:
+            self._init_interrupts(EXPANDER_INT_PIN)
+        get_inputengine().add(self)
+
+    def _init_interrupts(self, int_pin):
+        """Interrupt-on-change input: no bus traffic until a button moves"""
+        for mcp in self._mcps:
+            mcp.interrupt_state()  # clear anything pending
+        self._int_pin = Pin(int_pin, Pin.IN, Pin.PULL_UP)
+        self._int_pin.irq(self._on_interrupt, Pin.IRQ_FALLING)
+
+    def _on_interrupt(self, pin):
+        # IRQ context: the edge time is the moment the expander saw the change
+        self._irq_us = time.ticks_us()
+        get_inputengine().irq(self)
+
+    def _sample(self, woken):
+        """Mask of held buttons: one burst read per chip, whatever the number of buttons"""
+        ticks = time.ticks_us()
+        values = self._values
+        held = 0
+        flagged = 0  # buttons that raised the interrupt: they moved at _irq_us
+        chips_flagged = 0
+        # range() and indexing, not enumerate(): the 1 ms tick must not allocate
+        for chip in range(len(self._mcps)):
+            mcp = self._mcps[chip]
+            if woken:
+                # INTCAP holds the port as it was when the first change fired,
+                # so the edge is seen even if the switch bounced back since
+                flags, captured = mcp.interrupt_state()
+                fired = (0x00ff if flags & 0x00ff else 0) | (0xff00 if flags & 0xff00 else 0)
+                values[chip] = (captured & fired) | (values[chip] & ~fired)
+                # INTF flags the pin that fired, later changes on the chip aren't
+                # flagged. held() reads low pins: invert INTF to get its buttons.
+                if flags:
+                    chips_flagged += 1
+                    flagged |= self._topology.held(chip, ~flags & 0xffff)
+            else:
+                # in interrupt mode, reading GPIO also re-arms the interrupts
+                values[chip] = mcp.gpio
+            held |= self._topology.held(chip, values[chip])
+        if chips_flagged > 1:
+            # the chips share one open-drain line: only the first one made the edge,
+            # and which one is unknown. Don't give the IRQ time to a later press.
+            flagged = 0
+        self._stamp_moved(held, ticks, flagged, self._irq_us)
+        return held
+
+    def read_held(self):
+        """Mask of the buttons held right now, read from the chips (not debounced)"""
+        held = 0
+        for chip, mcp in enumerate(self._mcps):
+            held |= self._topology.held(chip, mcp.gpio)
+        return held
+
+    def _idle(self):
+        # with a shared open-drain line, a chip may still hold it low
+        return self._int_pin is not None and self._int_pin.value()
 
-        self.color = [j for i in range(4) for j in [COLORS[i]] * 4]
-        
     def __str__(self):
         """ Nice view of board
         
@@ -141,26 +527,12 @@ class _ArcadeButtons(_ButtonGroup):
         """
         mapping = {True: ' O', False: ' .'}
         out = ""
-        for x in range(4):
-            for y in range(4):
-                out += mapping[self.leds[array_to_index(x, y)]()]
+        for x in range(self._topology.rows):
+            for y in range(self._topology.cols):
+                out += mapping[self.leds[self._topology.index(x, y)]()]
             out += '\n'
         return out
 
-    @property
-    def pressed(self):
-        return [idx for idx, flag in enumerate(self.pressed_flag) if flag]
-    
-    @property
-    def released(self):
-        return [idx for idx, flag in enumerate(self.released_flag) if flag]
-
-    def reset_pressed(self):
-        self.pressed_flag = [False,] * self.size
-    
-    def reset_released(self):
-        self.released_flag = [False,] * self.size
-
     def items(self, color=None):
         if color is None:
             return zip(self.buttons, self.leds)
@@ -169,38 +541,109 @@ class _ArcadeButtons(_ButtonGroup):
             return zip([b for i, b in enumerate(self.buttons) if i in indices],
                        [l for i, l in enumerate(self.leds) if i in indices])
     
+    def _write_leds(self, mask, bits):
+        # LEDs in mask take the matching value in bits, the others keep theirs
+        leds = (self._leds & ~mask) | (bits & mask)
+        changed = leds ^ self._leds
+        if changed:
+            if not self._dirty:
+                get_inputengine().wake.set()  # an interrupt-driven engine may be asleep
+            self._leds = leds
+            self._dirty |= changed
+
+    def flush(self):
+        """Send the LED changes now: at most one masked write per chip.
+
+        The input engine calls this after each tick. Code that blocks
+        (time.sleep, no await) has to call it to show its LEDs.
+        """
+        dirty = self._dirty
+        if not dirty:
+            return
+        self._dirty = 0
+        topology = self._topology
+        for chip in range(len(self._mcps)):
+            mask = topology.latch(chip, dirty)
+            if mask:
+                # write_masked skips the bus if the latch already holds these values
+                self._mcps[chip].write_masked(mask, topology.latch(chip, self._leds))
+
+    # Frames: whole-board LED patterns on a logical mask, bit i for LED i.
+    # A frame is shown by a single flush, so it appears in one step for at most
+    # one write per chip, whatever the number of LEDs it changes.
+    def set_leds(self, mask):
+        """Light exactly the LEDs in mask"""
+        self._write_leds(self._all_leds, mask)
+
+    def get_leds(self):
+        """Mask of the lit LEDs"""
+        return self._leds
+
+    def apply(self, on_mask=0, off_mask=0):
+        """Light on_mask and turn off off_mask, the others keep their state (on wins)"""
+        self._write_leds(on_mask | off_mask, on_mask)
+
     def off(self):
-        [led.off() for led in self.leds]
+        self.set_leds(0)
     
     def on(self):
-        [led.on() for led in self.leds]
+        self.set_leds(self._all_leds)
     
 
 class _ControlPanel(_ButtonGroup):
-    def __init__(self):
+    name = 'panel'
+
+    def __init__(self, irq=True):
+        """
+        Args:
+            irq: wake the input engine on pin edges instead of being polled
+        """
         pins = [0, 1, 2, 3, 4]
         self.names = "up select right down left".split()
+        self._keys = self.names
+        self._bank = PinBank(pins)  # all five read at once
         self.buttons = [self.up, self.select, self.right, self.down, self.left] = [
-            Pushbutton(Pin(pin, Pin.IN, Pin.PULL_UP))
-            for pin in pins]
+            Button(self, i) for i in range(len(pins))]
+        self.events = EventRing()  # (index in names, PRESS/RELEASE, ticks_us of the first edge)
+        self._irq = irq
+        self._edges = EventRing(16)  # raw pin edges, filled by the IRQs
+        self._edge = [0, 0, 0]
+        self._edge_us = array('L', [0] * len(pins))
+        self._counts = array('H', [0] * len(pins))
         self.reset_flags()
-        for i, but in enumerate(self.buttons):
-            but.press_func(self._press, (self.names[i],))
-            but.release_func(self._release, (self.names[i],))
-    
-    @property
-    def pressed(self):
-        return [key for key, flag in self.pressed_flag.items() if flag]
-    
-    @property
-    def released(self):
-        return [key for key, flag in self.released_flag.items() if flag]
-    
-    def reset_pressed(self):
-        self.pressed_flag = {key: False for key in self.names}
-    
-    def reset_released(self):
-        self.released_flag = {key: False for key in self.names}
+        self._load_lockout()
+        engine = get_inputengine()
+        engine.add(self)
+        if irq:
+            for i, pin in enumerate(self._bank.pins):
+                pin.irq(self._irq_handler(engine, i), Pin.IRQ_FALLING | Pin.IRQ_RISING)
+
+    def _irq_handler(self, engine, i):
+        edges = self._edges
+
+        def handler(pin):
+            # IRQ context: record the edge and wake the engine, which debounces it
+            edges.put(i, RELEASE if pin.value() else PRESS, time.ticks_us())
+            engine.irq(self)
+        return handler
+
+    def read_held(self):
+        """Mask of the buttons held right now (not debounced)"""
+        return ~self._bank.value() & self._bank.mask  # pulled up: low when held
+
+    def _sample(self, woken):
+        held = self.read_held()
+        edge = self._edge
+        while self._edges.get(edge):
+            self._stamp(edge[0], edge[2])
+        self._stamp_moved(held, time.ticks_us())  # edges the IRQs didn't see
+        return held
+
+    def _idle(self):
+        return self._irq
+
+    def _index(self, key):
+        return self.names.index(key)
 
 
 
@@ -222,23 +665,46 @@ def get_controlpanel():
     return _CONTROLPANEL
 
 
+async def wait_any(*groups, timeout_ms=None):
+    """Wait for a press on any of the groups.
+
+    Each item is a button group or a (group, mask) pair. Returns the first
+    group with a matching press, or None on timeout.
+    """
+    groups = [g if isinstance(g, tuple) else (g, -1) for g in groups]
+
+    def pressed():
+        for group, mask in groups:
+            if group._pressed & mask:
+                return group
+        return None
+
+    if await get_inputengine().wait(pressed, timeout_ms):
+        return pressed()
+    return None
+
+
+# Blocking helpers: the LED is written now, not at the next input engine tick
 def on(led):
     led.output(val=1)
+    get_arcadebuttons().flush()
 
 
 def off(led):
     led.output(val=0)
+    get_arcadebuttons().flush()
 
 
 def toggle(led):
     led.output(val=int(not led.value()))
+    get_arcadebuttons().flush()
 
 
 def blink(led, up, down, times):
     for _ in times:
-        led.output(val=1)
+        on(led)
         time.sleep(up)
-        led.output(val=0)
+        off(led)
         time.sleep(down)
 
 
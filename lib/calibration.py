@@ -0,0 +1,27 @@
+"""Calibration data kept in flash as JSON, one section per subsystem.
+
+Debounce windows: section 'debounce', {group name: [ms per button]},
+written by apps/app_calibrate.py and loaded by the button groups at boot.
+"""
+import json
+
+CALIBRATION_FILE = 'calibration.json'
+
+
+def _read():
+    try:
+        with open(CALIBRATION_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError):  # no file yet, or corrupted
+        return {}
+
+
+def load(section, default=None):
+    return _read().get(section, default)
+
+
+def save(section, value):
+    data = _read()
+    data[section] = value
+    with open(CALIBRATION_FILE, 'w') as f:
+        json.dump(data, f)
@@ -0,0 +1,113 @@
+"""Software PWM for the arcade LEDs: 8 brightness levels on on/off outputs.
+
+The expanders can only switch LEDs on and off, so brightness is made by
+binary code modulation: bit k of every LED's level makes bit plane k, a
+frame of the board, shown for unit_ms << k. A refresh shows the 3 planes
+in turn, so a LED at level L is lit L / 7 of the time.
+
+A plane is an LED frame (set_leds() then flush()): at most one burst write
+per chip, and nothing at all on chips whose LEDs are all fully on or off.
+report() prints the achieved refresh rate and the share of time spent
+writing planes, the bus time the input engine has to share.
+"""
+import asyncio
+import utime as time
+from array import array
+from lib.buttons import get_arcadebuttons
+from lib.bitmask import iter_bits
+
+LEVELS = 8       # brightness levels, 0 (off) to LEVELS - 1 (fully on)
+_PLANES = const(3)
+
+
+class _Dimmer:
+    unit_ms = 1  # display time of the least significant plane, a refresh takes 7 units
+
+    def __init__(self):
+        self._arcade = arcade = get_arcadebuttons()
+        self._levels = bytearray(arcade.size)
+        # bit i of plane k: bit k of LED i's level. Sized like the topology's
+        # masks: 'H' and 'L' are 16 and 32 bits on the RP2040, a list beyond.
+        size = arcade.size
+        planes = [0] * _PLANES
+        self._planes = planes if size > 32 else array('H' if size <= 16 else 'L', planes)
+        self._task = None
+        self._frames = 0
+        self._bus_us = 0  # time spent writing planes
+        self._since = time.ticks_us()
+
+    def level(self, key):
+        return self._levels[key]
+
+    def set_level(self, key, level):
+        level = min(max(level, 0), LEVELS - 1)
+        self._levels[key] = level
+        bit = 1 << key
+        planes = self._planes
+        for k in range(_PLANES):
+            if level & (1 << k):
+                planes[k] |= bit
+            else:
+                planes[k] &= ~bit
+
+    def set_levels(self, mask, level):
+        """Same level for every LED in mask"""
+        for i in iter_bits(mask):
+            self.set_level(i, level)
+
+    def start(self):
+        """Take over the LEDs: levels are shown until stop()"""
+        if self._task is None:
+            self.stats()  # start counting from now
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        """Give the LEDs back, lit if their level isn't 0"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        planes = self._planes
+        self._arcade.set_leds(planes[0] | planes[1] | planes[2])
+
+    def stats(self):
+        """(refresh rate in Hz, % of the time spent writing planes) since the last call"""
+        now = time.ticks_us()
+        elapsed = max(time.ticks_diff(now, self._since), 1)
+        hz = self._frames * 1_000_000 // elapsed
+        bus = self._bus_us * 100 // elapsed
+        self._frames = self._bus_us = 0
+        self._since = now
+        return hz, bus
+
+    def report(self):
+        hz, bus = self.stats()
+        target = 1000 // (self.unit_ms * ((1 << _PLANES) - 1))
+        print(f"Dimmer: {hz} Hz refresh (target {target} Hz), {bus}% of the time writing LEDs")
+
+    async def _run(self):
+        arcade = self._arcade
+        planes = self._planes
+        due = time.ticks_ms()
+        while True:
+            for k in range(_PLANES):
+                t0 = time.ticks_us()
+                arcade.set_leds(planes[k])
+                arcade.flush()
+                self._bus_us += time.ticks_diff(time.ticks_us(), t0)
+                due = time.ticks_add(due, self.unit_ms << k)
+                late = time.ticks_diff(time.ticks_ms(), due)
+                if late > 0:
+                    # fell behind (the loop was busy): drop the lost time, don't catch up
+                    due = time.ticks_add(due, late)
+                await asyncio.sleep_ms(-late if late < 0 else 0)
+            self._frames += 1
+
+
+_DIMMER = None
+
+
+def get_dimmer():
+    global _DIMMER
+    if _DIMMER is None:
+        _DIMMER = _Dimmer()
+    return _DIMMER
@@ -0,0 +1,158 @@
+"""Input engine: one task scans every button group.
+
+Each tick reads each expander once (one burst per chip) and the native
+pins once, debounces all buttons of a group at once on bitmasks, then
+updates the press/release state of all groups together.
+Groups provide:
+    _sample(woken): raw mask of held buttons, bit i for button i
+    _apply_state(state): report the debounced state, returns True on change
+    _idle(): True when the group can wait for an interrupt instead of being polled
+    _deadline, _expire(now): optional timer (ticks_ms), _expire(now) is called once it passed
+    _locked, _unlocked(raw, state): buttons locked out after an edge, and the sample
+        with them held at their debounced state
+    _dirty, flush(): optional outputs changed since the last tick, flush() sends them.
+        Setting _dirty also sets engine.wake, in case the engine waits for an IRQ.
+Interrupt-driven groups call engine.irq(group) from their IRQ handler.
+An exception from a group is printed and the engine carries on with the next
+one: every input of the machine goes through this task.
+Tasks waiting for input await engine.wait(ready): it sleeps on an event the
+engine sets after each change, so waiting costs nothing until something happens.
+Polled groups are sampled at the rate of the current profile (set_profile()):
+every millisecond in games, slower in menus and idle mode. As soon as a
+button moves the engine samples at the fast rate until it has settled.
+"""
+import sys
+import asyncio
+import utime as time
+from primitives.debounce import Debouncer
+
+
+class _InputEngine:
+    scan_ms = 1  # fast sampling period, a change is reported after Debouncer.samples periods
+    # sampling period of each profile while no button moves
+    profiles = {'game': 1, 'menu': 10, 'idle': 30}
+
+    def __init__(self):
+        self._groups = []
+        self.profile = 'game'
+        self._period_ms = self.scan_ms
+        self.wake = asyncio.ThreadSafeFlag()  # set by the IRQs of interrupt-driven groups
+        self.changed = asyncio.Event()  # set after any group reported a change
+        self._task = None
+
+    def add(self, group):
+        group._state = group._sample(False)
+        group._debouncer = Debouncer(width=len(group._keys), state=group._state)
+        group._quiet = False    # interrupt driven and nothing moving: not sampled
+        group._pending = False  # IRQ fired since the last sample
+        self._groups.append(group)
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def set_profile(self, profile):
+        """Select the scan rate: 'game', 'menu' or 'idle'"""
+        self._period_ms = self.profiles[profile]
+        self.profile = profile
+
+    def irq(self, group):
+        # may be called from IRQ context
+        group._pending = True
+        self.wake.set()
+
+    async def wait(self, ready, timeout_ms=None):
+        """Wait until ready() is true, checked again after each change. False on timeout"""
+        if timeout_ms is not None:
+            deadline = time.ticks_add(time.ticks_ms(), timeout_ms)
+        while not ready():
+            self.changed.clear()
+            if timeout_ms is None:
+                await self.changed.wait()
+                continue
+            remaining = time.ticks_diff(deadline, time.ticks_ms())
+            if remaining <= 0:
+                return False
+            try:
+                await asyncio.wait_for_ms(self.changed.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+        return True
+
+    async def _run(self):
+        while True:
+            idle = True
+            changed = False
+            moving = False  # a raw sample differs from the debounced state
+            for group in self._groups:
+                if group._quiet and not group._pending:
+                    continue
+                woken = group._pending
+                group._pending = False
+                debouncer = group._debouncer
+                try:
+                    raw = group._sample(woken)
+                    if group._locked:
+                        raw = group._unlocked(raw, debouncer.state)
+                    if debouncer.update(raw):
+                        changed = group._apply_state(debouncer.state) or changed
+                except Exception as e:
+                    _report(group, e)
+                # locked buttons are sampled until unlocked, in case they moved meanwhile
+                busy = debouncer.unsettled or group._locked
+                moving = moving or busy
+                group._quiet = not busy and group._idle()
+                idle = idle and group._quiet
+            now = time.ticks_ms()
+            deadline = None
+            for group in self._groups:
+                if group._deadline is None:
+                    continue
+                if time.ticks_diff(group._deadline, now) <= 0:
+                    try:
+                        group._expire(now)
+                    except Exception as e:
+                        group._deadline = None  # don't fail again on every tick
+                        _report(group, e)
+                    changed = True
+                if group._deadline is not None and (
+                        deadline is None or time.ticks_diff(group._deadline, deadline) < 0):
+                    deadline = group._deadline
+            for group in self._groups:
+                if group._dirty:
+                    try:
+                        group.flush()
+                    except Exception as e:
+                        _report(group, e)
+            if changed:
+                self.changed.set()
+            if not idle:
+                # first edge seen: back to the fast rate to debounce it
+                period = self.scan_ms if moving else self._period_ms
+                if deadline is not None:
+                    period = max(min(period, time.ticks_diff(deadline, time.ticks_ms())), 0)
+                await asyncio.sleep_ms(period)
+            elif deadline is None:
+                # every group is interrupt driven and quiet: no bus traffic until an IRQ fires
+                await self.wake.wait()
+            else:
+                # sleep until an IRQ or the next timer, whichever comes first
+                remaining = time.ticks_diff(deadline, time.ticks_ms())
+                if remaining > 0:
+                    try:
+                        await asyncio.wait_for_ms(self.wake.wait(), remaining)
+                    except asyncio.TimeoutError:
+                        pass
+
+
+def _report(group, e):
+    print("Input engine: error in {}:".format(type(group).__name__))
+    sys.print_exception(e)
+
+
+_INPUTENGINE = None
+
+
+def get_inputengine():
+    global _INPUTENGINE
+    if _INPUTENGINE is None:
+        _INPUTENGINE = _InputEngine()
+    return _INPUTENGINE
@@ -10,6 +10,8 @@ class GameMenu:
     def __init__(self, categories):
         self.oled = get_oled()
         self.cp = get_controlpanel()
+        # holding up or down scrolls
+        self.cp.gestures(repeat=self.cp.mask('up', 'down'))
         self.categories = categories
         self.in_category = False
         self.current_category = 0
@@ -100,15 +102,15 @@ class GameMenu:
         Returns:
             str or None: Selected game name if a game was selected, None otherwise
         """
-        if 'up' in self.cp.pressed:
+        if self.cp.is_pressed('up'):
             self.move(-1)
-        elif 'down' in self.cp.pressed:
+        elif self.cp.is_pressed('down'):
             self.move(1)
-        elif 'select' in self.cp.pressed:
+        elif self.cp.is_pressed('select'):
             result = self.select()
             self.cp.reset_flags()
             return result
-        elif 'left' in self.cp.pressed:
+        elif self.cp.is_pressed('left'):
             self.back()
 
         self.cp.reset_flags()
@@ -4,14 +4,16 @@ import urandom as random
 from lib.buttons import get_arcadebuttons, get_controlpanel
 
 
-def binary_score(score):
-    arcade = get_arcadebuttons()
-    arcade.off()
+# LED of each bit of binary_score, most significant first
+_BINARY_LEDS = (0, 4, 8, 12, 1, 5, 9, 13, 2, 6, 10, 14, 3, 7, 11, 15)
 
-    leds = [arcade.leds[i]
-            for i in (0, 4, 8, 12, 1, 5, 9, 13, 2, 6, 10, 14, 3, 7, 11, 15)]
-    for led, v in zip(leds, f'{score:016b}'):
-        led.output(val=int(v)) 
+
+def binary_score(score):
+    mask = 0
+    for bit, idx in enumerate(_BINARY_LEDS):
+        if score & (0x8000 >> bit):
+            mask |= 1 << idx
+    get_arcadebuttons().set_leds(mask)
 
 
 class DigitalScorer:
@@ -27,10 +29,11 @@ OOO  ..O  OOO  OOO  ..O  OO.  OOO  ..O  OOO  .O."""
                        for col in zip(*self.digits.split('\n'))).split()[digit]
 
     def show_digit(self, digit):
-        arcade = get_arcadebuttons()
-        for led, flag in zip(arcade.leds[:12], self._pattern(digit)):
-            if {'.': False, 'O': True}[flag]:
-                led.on()
+        mask = 0
+        for i, flag in enumerate(self._pattern(digit)):
+            if flag == 'O':
+                mask |= 1 << i
+        get_arcadebuttons().apply(on_mask=mask)
     
     async def display_score(self, score, interval=800):
         arcade = get_arcadebuttons()
@@ -44,7 +47,7 @@ OOO  ..O  OOO  OOO  ..O  OO.  OOO  ..O  OOO  .O."""
     async def interruptable_score(self, score):
         arcade = get_arcadebuttons()
         arcade.reset_flags()
-        while not arcade.pressed:
+        while not arcade.pressed_mask:
             await self.display_score(score)
             await asyncio.sleep_ms(1000)
 
@@ -56,9 +59,9 @@ async def _test():
     cp = get_controlpanel()
     cp.reset_flags()
     key = 0
-    while 'select' not in cp.pressed:
+    while not cp.is_pressed('select'):
         d.light(key)
-        while not arcade.pressed:
+        while not arcade.pressed_mask:
             await asyncio.sleep_ms(1)
         key = (key + 1) % 10
         arcade.reset_flags()
@@ -43,7 +43,7 @@ async def test_app_loop(app_func, *args, **kwargs):
             
             # Wait for button press with timeout
             start_time = time.ticks_ms()
-            while not arcade.pressed:
+            while not arcade.pressed_mask:
                 if time.ticks_diff(time.ticks_ms(), start_time) > 5000:  # 5 second timeout
                     print('Timeout reached, restarting app...')
                     break
@@ -0,0 +1,269 @@
+# buttons_test.py Host-side tests for the arcade buttons: press counting, LED frames
+
+# Runs on the MicroPython unix port (no hardware needed), from the repo root:
+# micropython -c "from lib.tests.buttons_test import test; test()"
+
+import sys
+import asyncio
+import utime as time
+
+try:
+    from machine import Pin, I2C
+except ImportError:  # unix port: only what the button groups touch at import
+    class _Pin:
+        IN = OUT = OPEN_DRAIN = PULL_UP = IRQ_FALLING = IRQ_RISING = 0
+
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def value(self, *args):
+            return 1
+
+        def irq(self, *args, **kwargs):
+            pass
+
+    class _Machine:
+        Pin = _Pin
+        I2C = _Pin
+
+    sys.modules['machine'] = _Machine
+
+from drivers.tests.mcp23017_test import FakeI2C, printres, allocates
+import lib.buttons as buttons
+from lib.inputs import get_inputengine
+from lib.topology import Topology, button_led_pairs
+from primitives.debounce import Debouncer
+
+RATE = 40         # presses per second on each button
+SECONDS = 2
+BOUNCE_MS = 1     # contact bounce at each press, shorter than the debounce window
+
+
+async def hold(i2c, ms, scans):
+    """Keep the levels for ms, and for at least scans input scans.
+
+    The scans bound keeps a host hiccup from hiding a press from the engine:
+    this tests the counting, not the host's scheduling.
+    """
+    start = i2c.transactions
+    await asyncio.sleep_ms(ms)
+    while i2c.transactions - start < scans * len(i2c.chips):  # one read per chip per scan
+        await asyncio.sleep_ms(0)
+
+
+async def masher(i2c, address, pin, presses):
+    """Press a button presses times at RATE, bouncing on every press"""
+    bit = 1 << (pin & 7)
+    port = pin >> 3
+    levels = i2c.inputs[address]
+    period = 1000 // RATE
+    scans = Debouncer.samples + 1
+    for _ in range(presses):
+        levels[port] &= ~bit
+        await asyncio.sleep_ms(BOUNCE_MS)
+        levels[port] |= bit
+        await asyncio.sleep_ms(BOUNCE_MS)
+        levels[port] &= ~bit
+        await hold(i2c, period // 2 - 2 * BOUNCE_MS, scans)
+        levels[port] |= bit
+        await hold(i2c, period - period // 2, scans)
+
+
+async def reader(arcade, key, every_ms, until):
+    """Take the count every every_ms like a game loop, return the total"""
+    total = 0
+    while not until.is_set():
+        await asyncio.sleep_ms(every_ms)
+        total += arcade.take_presses(key)
+    await asyncio.sleep_ms(50)  # last release settles
+    return total + arcade.take_presses(key)
+
+
+def make_arcade(topology=None):
+    topology = topology or buttons.TOPOLOGY
+    buttons.EXPANDER_INT_PIN = None  # poll the expanders
+    buttons.DEBUG = False
+    i2c = buttons.I2C0 = FakeI2C(*topology.chips)
+    arcade = buttons._ArcadeButtons(topology)
+    arcade.set_lockout([0] * arcade.size)
+    return i2c, arcade
+
+
+async def mash_test():
+    i2c, arcade = make_arcade()
+    topology = buttons.TOPOLOGY
+    get_inputengine().set_profile('game')
+    await asyncio.sleep_ms(20)
+    arcade.reset_counts()
+
+    presses = RATE * SECONDS
+    left, right = 3, 12
+    done = asyncio.Event()
+    readers = (asyncio.create_task(reader(arcade, left, 10, done)),  # tug of war loop
+               asyncio.create_task(reader(arcade, right, 250, done)))  # slow reader
+    t0 = time.ticks_ms()
+    await asyncio.gather(masher(i2c, *topology.buttons[left], presses),
+                         masher(i2c, *topology.buttons[right], presses))
+    rate = presses * 1000 // time.ticks_diff(time.ticks_ms(), t0)
+    done.set()
+    counted = [await task for task in readers]
+
+    ok = printres('mashing at {} presses/s'.format(rate), rate >= 30)
+    ok &= printres('every press counted, polled every 10 ms', counted[0] == presses)
+    ok &= printres('every press counted, polled every 250 ms', counted[1] == presses)
+    ok &= printres('other buttons not counted',
+                   not any(arcade.take_presses(i) for i in range(arcade.size)))
+    return ok
+
+
+def latches(i2c):
+    # OLATA | OLATB << 8 of each chip
+    return [regs[0x14] | (regs[0x15] << 8) for regs in i2c.chips.values()]
+
+
+async def led_test():
+    i2c, arcade = make_arcade()
+    i2c.transactions = 0
+    for led in arcade.leds:
+        led.toggle()
+    arcade.leds[0].off()
+    ok = printres('LED writes wait for the flush', i2c.transactions == 0)
+    ok &= printres('LED reads come from RAM', arcade.leds[1]() == 1 and arcade.leds[0]() == 0
+                   and i2c.transactions == 0)
+    arcade.flush()
+    ok &= printres('flush is one write per chip', i2c.transactions == len(i2c.chips))
+    lit = [arcade._topology.latch(chip, 0xfffe) for chip in range(len(i2c.chips))]
+    ok &= printres('latches match the LED word', latches(i2c) == lit)
+    i2c.transactions = 0
+    arcade.leds[5].off()
+    arcade.leds[5].on()
+    arcade.flush()
+    ok &= printres('unchanged LEDs are not written', i2c.transactions == 0)
+    arcade.off()
+    await asyncio.sleep_ms(10)
+    ok &= printres('input engine flushes each tick', latches(i2c) == [0] * len(i2c.chips))
+    return ok
+
+
+def frame_test():
+    i2c, arcade = make_arcade()
+    arcade.set_leds(0xa5a5)
+    arcade.apply(on_mask=0x000f, off_mask=0xf000)
+    ok = printres('apply keeps the other LEDs', arcade.get_leds() == 0x05af)
+    i2c.transactions = 0
+    arcade.flush()
+    ok &= printres('frame is one write per chip', i2c.transactions <= len(i2c.chips))
+    lit = [arcade._topology.latch(chip, 0x05af) for chip in range(len(i2c.chips))]
+    ok &= printres('frame latched', latches(i2c) == lit)
+    arcade.off()
+    arcade.flush()
+    return ok
+
+
+def noalloc_test():
+    # the input engine runs these every millisecond: a quiet tick must not touch the heap
+    i2c, arcade = make_arcade()
+    arcade._sample(False)  # warm up
+    ok = printres('arcade scan does not allocate', not allocates(arcade._sample, False))
+    arcade.set_leds(0x0f0f)
+    arcade.flush()
+    arcade.set_leds(0xf0f0)
+    ok &= printres('LED flush does not allocate', not allocates(arcade.flush))
+    ok &= printres('flush still latched', latches(i2c) == [
+        arcade._topology.latch(chip, 0xf0f0) for chip in range(len(i2c.chips))])
+    arcade.off()
+    arcade.flush()
+    return ok
+
+
+def legacy_test():
+    i2c, arcade = make_arcade()
+    buttons._ARCADEBUTTONS = arcade
+    iodir = [regs[0] | (regs[1] << 8) for regs in i2c.chips.values()]
+    pins, leds = buttons.button_init(16)
+    buttons.on(leds[3])
+    ok = printres('button_init keeps the chips set up',
+                  [regs[0] | (regs[1] << 8) for regs in i2c.chips.values()] == iodir)
+    ok &= printres('legacy on() is written at once', latches(i2c) == [
+        arcade._topology.latch(chip, 1 << 3) for chip in range(len(i2c.chips))])
+    buttons.off(leds[3])
+    ok &= printres('legacy buttons read the raw pins', all(pin.value() == 1 for pin in pins))
+    return ok
+
+
+async def large_board_test():
+    # 8x4 board on four chips: buttons 16 and up go through the same path
+    chips = (0x20, 0x21, 0x22, 0x23)
+    pins, leds = [], []
+    for address in chips:
+        b, l = button_led_pairs(address, range(0, 16, 2))
+        pins += b
+        leds += l
+    i2c, arcade = make_arcade(Topology(chips, pins, leds, rows=8, cols=4))
+    await asyncio.sleep_ms(10)
+    arcade.reset_flags()
+    address, pin = pins[20]
+    i2c.inputs[address][pin >> 3] &= ~(1 << (pin & 7))
+    await asyncio.sleep_ms(20)
+    ok = printres('button 20 held', arcade.read_held() == 1 << 20)
+    ok &= printres('button 20 debounced and pressed',
+                   arcade.held_mask == 1 << 20 and arcade.pressed == [20])
+    ok &= printres('button value() is True while held',
+                   arcade.buttons[20].value() and not arcade.buttons[19]())
+    i2c.inputs[address][pin >> 3] |= 1 << (pin & 7)
+    await asyncio.sleep_ms(20)
+    return ok
+
+
+def press(i2c, topology, key, down=True):
+    address, pin = topology.buttons[key]
+    if down:
+        i2c.inputs[address][pin >> 3] &= ~(1 << (pin & 7))
+    else:
+        i2c.inputs[address][pin >> 3] |= 1 << (pin & 7)
+
+
+async def hold_error_test():
+    i2c, arcade = make_arcade()
+    topology = arcade._topology
+    fired = []
+
+    def broken():
+        fired.append(1)
+        raise ValueError('callback bug')
+
+    arcade.on_hold(0, 20, broken)
+    await asyncio.sleep_ms(10)
+    arcade.reset_flags()
+    press(i2c, topology, 0)
+    await asyncio.sleep_ms(50)
+    press(i2c, topology, 0, False)
+    await asyncio.sleep_ms(20)
+    ok = printres('raising hold callback called', fired == [1])
+    arcade.reset_flags()
+    press(i2c, topology, 5)
+    await asyncio.sleep_ms(20)
+    ok &= printres('engine still running after it', arcade.pressed == [5])
+    press(i2c, topology, 5, False)
+    await asyncio.sleep_ms(20)
+    return ok
+
+
+async def _test():
+    # one event loop: the input engine task lives in the loop that created it
+    ok = await led_test()
+    ok &= frame_test()
+    ok &= noalloc_test()
+    ok &= legacy_test()
+    ok &= await large_board_test()
+    ok &= await hold_error_test()
+    ok &= await mash_test()
+    return ok
+
+
+def test():
+    try:
+        ok = asyncio.run(_test())
+    finally:
+        asyncio.new_event_loop()
+    print('All tests passed' if ok else 'Some tests FAILED')
@@ -0,0 +1,89 @@
+# dimmer_test.py Host-side tests for the LED dimmer (software PWM)
+
+# Runs on the MicroPython unix port (no hardware needed), from the repo root:
+# micropython -c "from lib.tests.dimmer_test import test; test()"
+
+import asyncio
+import utime as time
+from lib.tests.buttons_test import make_arcade, latches, printres
+from lib.topology import Topology, button_led_pairs
+import lib.buttons as buttons
+import lib.dimmer as dimmer
+
+
+async def duty_test():
+    i2c, arcade = make_arcade()
+    buttons._ARCADEBUTTONS = arcade
+    dim = dimmer.get_dimmer()
+    dim.set_level(0, 0)
+    dim.set_level(1, 3)
+    dim.set_level(2, 7)
+    dim.set_levels(0xfff0, 5)
+    ok = printres('bit planes', list(dim._planes) == [0xfff6, 0x0006, 0xfff4])
+
+    # the share of time each LED is lit follows its level
+    lit = [0] * 3
+    dim.start()
+    await asyncio.sleep_ms(1)  # first plane shown
+    start = last = time.ticks_us()
+    while time.ticks_diff(last, start) < 500_000:
+        leds = arcade.get_leds()
+        await asyncio.sleep_ms(0)
+        now = time.ticks_us()
+        for i in range(3):
+            if leds & (1 << i):
+                lit[i] += time.ticks_diff(now, last)
+        last = now
+    total = time.ticks_diff(last, start)
+    hz, bus = dim.stats()
+    dim.stop()
+    await asyncio.sleep_ms(10)  # flushed by the input engine
+    ok &= printres('level 0 never lit, 7 always lit', lit[0] == 0 and lit[2] == total)
+    ok &= printres('level 3 lit about 3/7 of the time', 0.3 < lit[1] / total < 0.55)
+    ok &= printres('refresh rate measured ({} Hz)'.format(hz), hz > 0)
+    ok &= printres('bus budget measured ({}%)'.format(bus), 0 <= bus < 100)
+    ok &= printres('stop leaves the lit LEDs on', arcade.get_leds() == 0xfff6
+                   and latches(i2c) == [arcade._topology.latch(chip, 0xfff6)
+                                        for chip in range(len(i2c.chips))])
+    return ok
+
+
+async def large_board_test():
+    # 6x6 board on five chips: planes wider than 32 bits
+    chips = (0x20, 0x21, 0x22, 0x23, 0x24)
+    pins, leds = [], []
+    for address in chips:
+        b, l = button_led_pairs(address, range(0, 16, 2))
+        pins += b
+        leds += l
+    i2c, arcade = make_arcade(Topology(chips, pins[:36], leds[:36], rows=6, cols=6))
+    buttons._ARCADEBUTTONS = arcade
+    dim = dimmer._Dimmer()
+    board = (1 << arcade.size) - 1
+    dim.set_levels(board, 7)
+    dim.set_level(35, 2)
+    ok = printres('planes of a 36 LED board', list(dim._planes) == [
+        board & ~(1 << 35), board, board & ~(1 << 35)])
+    dim.start()
+    await asyncio.sleep_ms(20)
+    dim.stop()
+    await asyncio.sleep_ms(10)  # flushed by the input engine
+    ok &= printres('LEDs past 32 lit after stop', arcade.get_leds() == board
+                   and latches(i2c) == [arcade._topology.latch(chip, board)
+                                        for chip in range(len(i2c.chips))])
+    return ok
+
+
+async def _test():
+    # one event loop: the input engine task lives in the loop that created it
+    ok = await duty_test()
+    ok &= await large_board_test()
+    return ok
+
+
+def test():
+    try:
+        ok = asyncio.run(_test())
+    finally:
+        asyncio.new_event_loop()
+    print('All tests passed' if ok else 'Some tests FAILED')
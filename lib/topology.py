@@ -0,0 +1,132 @@
+"""Board topology: which expander pin is which button or LED.
+
+A topology is declared once and compiled at boot into per-chip masks and
+256-entry lookup tables, so scanning costs one burst read per chip whatever
+the number of buttons, and converting between pins and logical indices
+costs one table lookup per byte.
+
+Logical indices go column by column, as on the 4x4 board:
+ 0  4  8 12
+ 1  5  9 13
+ 2  6 10 14
+ 3  7 11 15
+"""
+from array import array
+
+# Colors, one per column of the 4x4 board
+COLORS = ("white", "blue", "red", "yellow")
+
+
+class Topology:
+    def __init__(self, chips, buttons, leds, rows, cols, colors=None):
+        """
+        Args:
+            chips: I2C addresses of the expanders
+            buttons: (chip address, pin) of each button, in logical order
+            leds: (chip address, pin) of each LED, in logical order
+            rows, cols: logical grid, rows * cols == len(buttons)
+            colors: color of each column (defaults to unnamed)
+        """
+        assert rows * cols == len(buttons) == len(leds)
+        self.chips = tuple(chips)
+        self.buttons = tuple(buttons)
+        self.leds = tuple(leds)
+        self.rows = rows
+        self.cols = cols
+        self.size = len(self.buttons)
+        if colors is None:
+            colors = [None] * cols
+        self.color = [colors[i // rows] for i in range(self.size)]
+        self._compile()
+
+    def _compile(self):
+        nchips = len(self.chips)
+        self.button_masks = [0] * nchips  # button pins of each chip: pulled-up inputs
+        self.led_masks = [0] * nchips     # LED pins of each chip: outputs
+        # per chip, (pin bit, logical bit) pairs for buttons and LEDs
+        self.button_map = [[] for _ in range(nchips)]
+        self.led_map = [[] for _ in range(nchips)]
+        for i, (address, pin) in enumerate(self.buttons):
+            chip = self.chips.index(address)
+            self.button_masks[chip] |= 1 << pin
+            self.button_map[chip].append((1 << pin, 1 << i))
+        for i, (address, pin) in enumerate(self.leds):
+            chip = self.chips.index(address)
+            assert not self.button_masks[chip] & (1 << pin), "pin used twice"
+            self.led_masks[chip] |= 1 << pin
+            self.led_map[chip].append((1 << pin, 1 << i))
+        # array items are 16 ('H') or 32 ('L') bits on the RP2040: bigger boards
+        # (6x6) keep their masks in plain lists of ints
+        typecode = 'H' if self.size <= 16 else 'L' if self.size <= 32 else None
+        # per chip and port: port byte -> logical mask of the buttons held (active low)
+        self._held_tables = []
+        for pairs in self.button_map:
+            self._held_tables.append([
+                self._table(typecode, [(pin_bit >> shift, bit) for pin_bit, bit in pairs
+                                       if (pin_bit >> shift) & 0xff], invert=True)
+                for shift in (0, 8)])
+        # per chip and byte of the logical mask: logical byte -> output latch bits
+        self._latch_tables = []
+        for pairs in self.led_map:
+            self._latch_tables.append([
+                self._table('H', [(bit >> shift, pin_bit) for pin_bit, bit in pairs
+                                  if (bit >> shift) & 0xff])
+                for shift in range(0, self.size, 8)])
+
+    @staticmethod
+    def _table(typecode, pairs, invert=False):
+        """256 entries: OR of the out bits of every (in bit, out bit) pair set in the index.
+
+        With invert, a pair counts when its in bit is clear.
+        A typecode of None makes a list, for out bits wider than 32.
+        """
+        out = [0] * 256  # out bits of each single in bit
+        for in_bit, out_bit in pairs:
+            out[in_bit] |= out_bit
+        table = [0] * 256
+        for index in range(1, 256):
+            low = index & -index  # entry = entry without its lowest bit + that bit
+            table[index] = table[index ^ low] | out[low]
+        if invert:
+            table = [table[0xff ^ index] for index in range(256)]
+        return table if typecode is None else array(typecode, table)
+
+    def held(self, chip, gpio):
+        """Logical mask of the buttons held on a chip, from its gpio value (active low)"""
+        tables = self._held_tables[chip]
+        return tables[0][gpio & 0xff] | tables[1][(gpio >> 8) & 0xff]
+
+    def latch(self, chip, leds):
+        """Output latch bits of a chip for a logical mask of lit LEDs"""
+        value = 0
+        for table in self._latch_tables[chip]:
+            value |= table[leds & 0xff]
+            leds >>= 8
+        return value
+
+    def index(self, x, y):
+        """Logical index of row x, column y"""
+        return y * self.rows + x
+
+    def position(self, idx):
+        """(row, column) of a logical index"""
+        return idx % self.rows, idx // self.rows
+
+
+def button_led_pairs(address, pins):
+    """(button, LED) pins for buttons on even pins with their LED on the next odd pin"""
+    return [(address, pin) for pin in pins], [(address, pin + 1) for pin in pins]
+
+
+def _board_4x4():
+    # Columns 0-1 (white, blue) on 0x27, pins 0-15 in order.
+    # Columns 2-3 (red, yellow) on 0x26, port B first.
+    buttons, leds = [], []
+    for address, pins in ((0x27, range(0, 16, 2)), (0x26, range(8, 16, 2)), (0x26, range(0, 8, 2))):
+        b, l = button_led_pairs(address, pins)
+        buttons += b
+        leds += l
+    return Topology(chips=(0x27, 0x26), buttons=buttons, leds=leds, rows=4, cols=4, colors=COLORS)
+
+
+BOARD_4X4 = _board_4x4()
@@ -1,13 +1,12 @@
 # main.py (Revised for uasyncio compatibility, using gather)
 import asyncio
-import time
 import sys
-from machine import Pin
 from main_menu import main_menu, cleanup
 from lib.oled import get_oled
+from lib.buttons import get_controlpanel
 
 # --- Configuration ---
-INTERRUPT_BUTTON_PIN = 1
+INTERRUPT_BUTTON = 'select'
 LONG_PRESS_DURATION_MS = 3000
 # ---------------------
 
@@ -31,40 +30,28 @@ def set_global_exception():
     loop = asyncio.get_event_loop()
     loop.set_exception_handler(_handle_exception)
 
-# --- MODIFIED: Accepts main_task_handle ---
-async def watch_interrupt_button(pin_number, long_press_ms, main_task_handle):
-    """Monitors a button for a long press and cancels the main task."""
-    # Configure the button pin
-    button = Pin(pin_number, Pin.IN, Pin.PULL_UP)
-    press_start_time = None
-    print(f"Interrupt watcher started on Pin {pin_number}. Hold for {long_press_ms / 1000}s to stop main task.")
+async def watch_interrupt_button(key, long_press_ms, main_task_handle):
+    """Cancels the main task when a control panel button is held long enough.
+
+    The input engine times the press from the button IRQs, so this task
+    sleeps until the long press happens instead of polling the pin.
+    """
+    long_press = asyncio.Event()
+    get_controlpanel().on_hold(key, long_press_ms, long_press.set)
+    print(f"Interrupt watcher started on '{key}'. Hold for {long_press_ms / 1000}s to stop main task.")
 
     try:
-        while not interrupt_signal['triggered']:
-            if button.value() == 0: # Button pressed (assuming pull-up)
-                if press_start_time is None:
-                    press_start_time = time.ticks_ms()
-                else:
-                    if time.ticks_diff(time.ticks_ms(), press_start_time) >= long_press_ms:
-                        print(f"Long press detected! Cancelling main task...")
-                        interrupt_signal['triggered'] = True
-                        # --- Directly cancel the main task ---
-                        if main_task_handle:
-                            main_task_handle.cancel()
-                        # ------------------------------------
-                        break # Exit watcher loop
-            else: # Button released
-                press_start_time = None
-
-            # Yield control
-            await asyncio.sleep_ms(50)
+        await long_press.wait()
+        print(f"Long press detected! Cancelling main task...")
+        interrupt_signal['triggered'] = True
+        # --- Directly cancel the main task ---
+        if main_task_handle:
+            main_task_handle.cancel()
+        # ------------------------------------
 
     except Exception as e:
         print("Error in interrupt watcher:")
         sys.print_exception(e)
-        # If watcher crashes, maybe still try to cancel main task? Optional.
-        # if main_task_handle and not main_task_handle.done():
-        #    main_task_handle.cancel()
     finally:
         print("Interrupt watcher finished.")
 
@@ -99,7 +86,7 @@ async def run_concurrently():
         main_task = asyncio.create_task(main_wrapper())
         # Create watcher task, passing the handle
         interrupt_task = asyncio.create_task(
-            watch_interrupt_button(INTERRUPT_BUTTON_PIN, LONG_PRESS_DURATION_MS, main_task)
+            watch_interrupt_button(INTERRUPT_BUTTON, LONG_PRESS_DURATION_MS, main_task)
         )
 
         # Run both tasks concurrently and wait for BOTH to complete.
@@ -1,9 +1,12 @@
 import gc
+import sys
 import utime as time
 import asyncio
 from drivers.buzzer import Buzzer
+from drivers.i2c import I2C0, INSTRUMENT
 from lib.buttons import get_arcadebuttons, get_controlpanel, COLORS
 from lib.oled import get_oled
+from lib.inputs import get_inputengine
 from apps.app_sequence import app_sequence
 from apps.app_light_chaser import app_light_chaser
 from apps.app_light_chaser_1v1 import app_light_chaser_1v1
@@ -18,6 +21,7 @@ from apps.app_mirror_fight import app_mirror_fight
 from apps.app_mirror_sequence import app_mirror_sequence
 from apps.app_tug_of_war import app_tug_of_war
 from apps.app_idle import app_idle
+from apps.app_calibrate import app_calibrate
 from lib.menu import GameCategory, GameMenu
 
 # BOARD
@@ -66,16 +70,24 @@ GAME_MAP = {
     "Mirror Fight": (app_mirror_fight, {}),
     "Tug of War": (app_tug_of_war, {}),
     "Buzzer": (app_buzzer, {}),
-    "Idle": (app_idle, {})
+    "Idle": (app_idle, {}),
+    "Calibrate": (app_calibrate, {})
+}
+
+# Input scan rate while a game runs (see lib/inputs.py), 'game' if not listed
+GAME_PROFILES = {
+    "Idle": 'idle',
 }
 
 def flash_start():
     arcade = get_arcadebuttons()
     arcade.on()
+    arcade.flush()  # blocking: the input engine can't flush until we return
     time.sleep_ms(500)
     for color in COLORS:
         for _, led in arcade.items(color=color):
             led.off()
+        arcade.flush()
         time.sleep_ms(500)
     print(" >> Go Go Go! <<")
 
@@ -96,6 +108,12 @@ async def play_game(game_name):
     mem_before = gc.mem_free()
     print(f"--> play_game: Mem free before calling {game_name}: {mem_before}")
 
+    if INSTRUMENT:
+        I2C0.reset()
+
+    engine = get_inputengine()
+    engine.set_profile(GAME_PROFILES.get(game_name, 'game'))
+
     res = None
     print(f"--> play_game: Calling {game_name}()...")
     try:
@@ -105,6 +123,7 @@ async def play_game(game_name):
     except Exception as e:
         print(f"--> play_game: EXCEPTION during function call ({game_name})!")
         sys.print_exception(e)
+        engine.set_profile('menu')
         return # Exit if the call itself failed
 
     # --- MODIFIED LOGIC ---
@@ -130,6 +149,11 @@ async def play_game(game_name):
 
     # --- End of modified logic ---
 
+    engine.set_profile('menu')
+
+    if INSTRUMENT:
+        I2C0.summary(game_name)
+
     gc.collect()
     mem_after = gc.mem_free()
     print(f"--> play_game: Mem free after await {game_name}: {mem_after} (Diff: {mem_before - mem_after})")
@@ -174,7 +198,8 @@ CATEGORIES = [
     ]),
     GameCategory("Utils", [
         "Buzzer",
-        "Idle"
+        "Idle",
+        "Calibrate"
     ])
 ]
 
@@ -182,6 +207,7 @@ async def main_menu():
     print("Starting menu...")
     menu = GameMenu(CATEGORIES)
     menu.draw_menu()
+    get_inputengine().set_profile('menu')
     
     while True:
         selected_game = menu.handle_input()
@@ -201,7 +227,9 @@ async def main_menu():
 
 def cleanup():
     Buzzer().end_tone()
-    get_arcadebuttons().off()
+    arcade = get_arcadebuttons()
+    arcade.off()
+    arcade.flush()  # the event loop has stopped
     get_oled().clear_screen(True)
 
 if __name__ == '__main__':
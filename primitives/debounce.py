@@ -0,0 +1,37 @@
+# debounce.py Bitmask debouncer for buttons sampled together
+# Usage:
+# from primitives.debounce import Debouncer
+
+class Debouncer:
+    """Vertical counter debouncer over a bitmask of buttons.
+
+    Each button has a 2-bit counter spread over two masks, so every button
+    is debounced with a handful of bitwise operations. A button changes
+    state once its raw value has differed from the debounced one for 4
+    consecutive samples. Sampled every millisecond, that reports an edge
+    after 4 ms while rejecting shorter glitches.
+    """
+    samples = 4  # consecutive samples needed to accept a change (fixed by the 2-bit counters)
+
+    def __init__(self, width=16, state=0):
+        self._mask = (1 << width) - 1
+        self.state = state & self._mask  # debounced state, bit set when held
+        self._ct0 = self._mask  # counter bits, all ones when idle
+        self._ct1 = self._mask
+        self.unsettled = 0  # buttons whose raw value differs from the debounced state
+
+    def update(self, raw):
+        """Feed one raw sample; returns the mask of buttons that changed state"""
+        delta = (raw ^ self.state) & self._mask
+        # count down where the sample differs, reset to 3 where it agrees
+        self._ct0 = ~(self._ct0 & delta) & self._mask
+        self._ct1 = self._ct0 ^ (self._ct1 & delta)
+        changed = delta & self._ct0 & self._ct1  # counters that rolled over
+        self.state ^= changed
+        self.unsettled = delta & ~changed
+        return changed
+
+    def reset(self, state=0):
+        self.state = state & self._mask
+        self._ct0 = self._ct1 = self._mask
+        self.unsettled = 0
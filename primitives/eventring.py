@@ -0,0 +1,80 @@
+# eventring.py Preallocated ring buffer of timestamped button events
+# Usage:
+# from primitives.eventring import EventRing, PRESS, RELEASE
+
+from array import array
+
+# Edge codes
+RELEASE = const(0)
+PRESS = const(1)
+# Gesture codes, see _ButtonGroup.gestures() in lib/buttons.py
+LONG = const(2)
+DOUBLE = const(3)
+REPEAT = const(4)
+
+
+class EventRing:
+    """Fixed-size ring of (button, edge, ticks_us) events.
+
+    put() doesn't allocate and may be called from an IRQ handler. A single
+    consumer reads events in order with get()/peek() into a caller-owned
+    3-item list, or passes them all to a callback with drain(). When full,
+    new events are dropped and counted in overflows.
+    """
+    def __init__(self, size=64):
+        self._size = size
+        self._button = bytearray(size)
+        self._edge = bytearray(size)
+        self._ticks = array('L', [0] * size)
+        self._head = 0  # next slot written
+        self._tail = 0  # next slot read
+        self.overflows = 0
+
+    def put(self, button, edge, ticks):
+        head = self._head
+        nxt = (head + 1) % self._size
+        if nxt == self._tail:
+            self.overflows += 1
+            return False
+        self._button[head] = button
+        self._edge[head] = edge
+        self._ticks[head] = ticks
+        self._head = nxt  # publish last, so a consumer never sees a half-written event
+        return True
+
+    def __len__(self):
+        return (self._head - self._tail) % self._size
+
+    def peek(self, event):
+        """Copy the oldest event into event[0:3] without removing it. False if empty"""
+        tail = self._tail
+        if tail == self._head:
+            return False
+        event[0] = self._button[tail]
+        event[1] = self._edge[tail]
+        event[2] = self._ticks[tail]
+        return True
+
+    def get(self, event):
+        """Like peek() but removes the event"""
+        if not self.peek(event):
+            return False
+        self._tail = (self._tail + 1) % self._size
+        return True
+
+    def drain(self, func=None):
+        """Pass every pending event to func(button, edge, ticks) and remove it.
+
+        Returns the number of events. Without func, events are just discarded.
+        """
+        n = 0
+        while self._tail != self._head:
+            tail = self._tail
+            if func is not None:
+                func(self._button[tail], self._edge[tail], self._ticks[tail])
+            self._tail = (tail + 1) % self._size
+            n += 1
+        return n
+
+    def clear(self):
+        self._tail = self._head
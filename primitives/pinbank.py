@@ -0,0 +1,61 @@
+# pinbank.py Read a group of native GPIO inputs at once
+# Usage:
+# from primitives.pinbank import PinBank
+# bank = PinBank((0, 1, 2, 3, 4))
+# levels = bank.value()  # bit i is the level of the i-th pin
+
+import sys
+from machine import Pin
+
+try:
+    from machine import mem32
+except ImportError:
+    mem32 = None
+
+_SIO_GPIO_IN = const(0xd0000004)  # RP2040 SIO: input level of every GPIO
+
+
+class PinBank:
+    """Levels of several GPIOs as one bitmask.
+
+    On the RP2040 all pins are sampled together by one read of the SIO
+    GPIO_IN register, and the group's bits are extracted with a table of
+    (shift, mask) pairs, one per run of consecutive pins. Elsewhere (host
+    emulators, other ports) each pin is read in turn with the same result.
+    """
+    def __init__(self, gpios, mode=Pin.IN, pull=Pin.PULL_UP):
+        self.gpios = tuple(gpios)
+        self.pins = [Pin(gpio, mode, pull) for gpio in self.gpios]
+        self.mask = (1 << len(self.gpios)) - 1
+        self._native = mem32 is not None and sys.platform == 'rp2'
+        self._table = self._compile(self.gpios)
+
+    @staticmethod
+    def _compile(gpios):
+        # Group bits i..j come from GPIOs g..g+(j-i): one shift and mask per run.
+        # Shifts are stored as GPIO - bit, masks in group bit positions.
+        table = []
+        start = 0
+        for i in range(1, len(gpios) + 1):
+            if i == len(gpios) or gpios[i] != gpios[i - 1] + 1:
+                mask = ((1 << (i - start)) - 1) << start
+                table.append((gpios[start] - start, mask))
+                start = i
+        return tuple(table)
+
+    def value(self):
+        """Bitmask of the pin levels, bit i for the i-th pin"""
+        if self._native:
+            raw = mem32[_SIO_GPIO_IN]
+            value = 0
+            for shift, mask in self._table:
+                value |= (raw >> shift if shift >= 0 else raw << -shift) & mask
+            return value
+        value = 0
+        for i, pin in enumerate(self.pins):
+            if pin.value():
+                value |= 1 << i
+        return value
+
+    def __call__(self):
+        return self.value()